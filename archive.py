@@ -0,0 +1,213 @@
+# archive.py
+
+import argparse
+import itertools
+import json
+import os
+import random
+import struct
+import zlib
+
+from events import render_event
+from logindex import GameSearch
+from roles import role_from_name
+from rules import RULES_VERSION
+
+# Archive of finished games. Each game is one frame: a 4-byte length and the game's
+# record, zlib-compressed against a preset dictionary of the pieces logbooks keep
+# repeating. Frames compress on their own, so an archive is read one game at a time
+# and appended to without touching earlier games. The dictionary is stored once in
+# the archive header, so old archives stay readable when the training changes.
+#
+#   MAGIC | dictionary length | dictionary | (frame length | frame)*
+
+MAGIC = b"MLOG"
+LENGTH = struct.Struct("<I")
+DICTIONARY_SIZE = 16 * 1024
+TRAINING_GAMES = 40  # Enough simulated games to fill the dictionary
+DEFAULT_PATH = "games.mla"
+
+
+def game_record(rules, winner=None):
+    # Everything needed to read the game back later, as plain JSON types. With the
+    # moderator's actions, replay.py can play the game again under later rules.
+    return {
+        "names": [p.name for p in rules.players],
+        "roles": [p.role.name if p.role else None for p in rules.players],
+        "nights": rules.night_count,
+        "winner": winner,
+        "logbook": [list(event) for event in rules.logbook],
+        "rules_version": RULES_VERSION,
+        "actions": [list(entry) for entry in rules.actions],
+    }
+
+
+def encode_record(record):
+    return json.dumps(record, separators=(",", ":")).encode("utf-8")
+
+
+def render_record(record):
+    names = {i + 1: name for i, name in enumerate(record["names"])}
+    return [render_event(tuple(event), names) for event in record["logbook"]]
+
+
+def train_dictionary(samples, size=DICTIONARY_SIZE):
+    # samples: serialized records of typical games. Whole runs of events recur from
+    # game to game, so the dictionary is made of the samples themselves, cut to size;
+    # zlib reaches the end of the dictionary most cheaply, so the latest samples win.
+    return b"".join(samples)[-size:]
+
+
+def sample_records(games=TRAINING_GAMES, seed=0):
+    # Serialized records of simulated games with the standard setups
+    from simulation import (
+        DEFAULT_POLICIES,
+        MAX_NIGHTS,
+        STANDARD_SETUPS,
+        new_game,
+        play_day,
+        play_night,
+    )
+
+    rng = random.Random(seed)
+    setups = list(STANDARD_SETUPS.values())
+    samples = []
+    for i in range(games):
+        rules = new_game(setups[i % len(setups)], rng, logging=True)
+        winner = rules.check_win_condition()
+        while not winner and rules.night_count < MAX_NIGHTS:
+            play_night(rules, DEFAULT_POLICIES, rng)
+            winner = rules.check_win_condition()
+            if winner:
+                break
+            play_day(rules, DEFAULT_POLICIES, rng)
+            rules.reset_night_actions()
+            winner = rules.check_win_condition()
+        samples.append(encode_record(game_record(rules, winner)))
+    return samples
+
+
+def default_dictionary():
+    return train_dictionary(sample_records())
+
+
+def read_exactly(f, size):
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Truncated game archive")
+    return data
+
+
+def read_header(f):
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a game archive")
+    (size,) = LENGTH.unpack(read_exactly(f, LENGTH.size))
+    return read_exactly(f, size)
+
+
+def complete_frames_end(f):
+    # Offset just past the last whole frame, reading on from the header
+    end = f.tell()
+    while True:
+        prefix = f.read(LENGTH.size)
+        if len(prefix) != LENGTH.size:
+            return end
+        (size,) = LENGTH.unpack(prefix)
+        if len(f.read(size)) != size:
+            return end
+        end = f.tell()
+
+
+class ArchiveWriter:
+    # Appends games to an archive, creating it with the given or default dictionary
+    def __init__(self, path=DEFAULT_PATH, dictionary=None):
+        if os.path.exists(path) and os.path.getsize(path) > 0:
+            self.file = open(path, "r+b")
+            self.dictionary = read_header(self.file)
+            # A crash mid-write leaves half a frame at the end; drop it before appending
+            self.file.truncate(complete_frames_end(self.file))
+            self.file.seek(0, os.SEEK_END)
+        else:
+            self.dictionary = dictionary or default_dictionary()
+            self.file = open(path, "wb")
+            self.file.write(MAGIC + LENGTH.pack(len(self.dictionary)) + self.dictionary)
+
+    def write(self, record):
+        compressor = zlib.compressobj(9, zdict=self.dictionary)
+        frame = compressor.compress(encode_record(record)) + compressor.flush()
+        self.file.write(LENGTH.pack(len(frame)) + frame)
+        # Each game is on disk before the next one starts
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_games(path=DEFAULT_PATH):
+    # Yields the archived records one at a time, reading one frame per game
+    with open(path, "rb") as f:
+        dictionary = read_header(f)
+        while True:
+            prefix = f.read(LENGTH.size)
+            if not prefix:
+                return
+            if len(prefix) != LENGTH.size:
+                raise ValueError("Truncated game archive")
+            (size,) = LENGTH.unpack(prefix)
+            decompressor = zlib.decompressobj(zdict=dictionary)
+            data = decompressor.decompress(read_exactly(f, size)) + decompressor.flush()
+            yield json.loads(data.decode("utf-8"))
+
+
+class ArchiveSearch(GameSearch):
+    # Every archived game loaded for searching, filed under its number in the archive
+    def __init__(self, path=DEFAULT_PATH, limit=None):
+        super().__init__()
+        for number, record in itertools.islice(enumerate(read_games(path), 1), limit):
+            roles = {
+                i + 1: role_from_name(role_name)
+                for i, role_name in enumerate(record["roles"])
+                if role_name
+            }
+            logbook = [tuple(event) for event in record["logbook"]]
+            self.add_game(number, record["names"], logbook, roles)
+
+
+def archive_game(rules, winner, path=DEFAULT_PATH):
+    with ArchiveWriter(path) as writer:
+        writer.write(game_record(rules, winner))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Read or convert a game archive.")
+    parser.add_argument("archive", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--show", type=int, default=None, help="print game N's logbook")
+    parser.add_argument("--import-json", help="add games from a JSON list of records")
+    parser.add_argument("--search", help='find entries in every game, e.g. "Hunter night 2"')
+    args = parser.parse_args()
+
+    if args.import_json:
+        with open(args.import_json) as f:
+            records = json.load(f)
+        with ArchiveWriter(args.archive) as writer:
+            for record in records:
+                writer.write(record)
+
+    if args.search:
+        archive = ArchiveSearch(args.archive)
+        for number, event in archive.search_text(args.search):
+            print(f"Game {number}: {archive.render(number, event)}")
+
+    games = 0
+    for number, record in enumerate(read_games(args.archive), 1):
+        games = number
+        if number == args.show:
+            print("\n".join(render_record(record)))
+    print(f"{games} games, {os.path.getsize(args.archive)} bytes")
@@ -0,0 +1,113 @@
+# broadcast.py
+
+import json
+
+KEYFRAME_INTERVAL = 20  # Send the full state after this many deltas
+SET_KEYS = ("eliminated", "disabled")  # Sent as added/removed player IDs
+
+
+def encode(message):
+    return json.dumps(message, separators=(",", ":")).encode("utf-8")
+
+
+def decode(data):
+    return json.loads(data.decode("utf-8"))
+
+
+def diff_state(old, new):
+    delta = {}
+    for key, value in new.items():
+        if key in SET_KEYS and key in old:
+            added = sorted(set(value) - set(old[key]))
+            removed = sorted(set(old[key]) - set(value))
+            if added or removed:
+                delta[key] = {"+": added, "-": removed}
+        elif old.get(key) != value:
+            delta[key] = value
+    return delta
+
+
+def apply_delta(state, delta):
+    for key, value in delta.items():
+        if key in SET_KEYS and isinstance(value, dict):
+            ids = set(state.get(key, [])) - set(value["-"])
+            state[key] = sorted(ids | set(value["+"]))
+        else:
+            state[key] = value
+    return state
+
+
+class Broadcaster:
+    # Publishes game state changes to local subscribers. Every message is encoded
+    # once and the same bytes are handed to all subscribers.
+    def __init__(self, keyframe_interval=KEYFRAME_INTERVAL):
+        self.keyframe_interval = keyframe_interval
+        self.subscribers = {}  # Used as an ordered set of callbacks
+        self.state = {}
+        self.seq = 0
+        self.deltas_since_keyframe = 0
+        self.force_keyframe = True
+        self.cached_keyframe = None
+
+    def subscribe(self, callback):
+        self.subscribers[callback] = None
+        # Late joiners catch up from a keyframe of the current state
+        if self.state:
+            callback(self.keyframe())
+        return callback
+
+    def unsubscribe(self, callback):
+        self.subscribers.pop(callback, None)
+
+    def keyframe(self):
+        if self.cached_keyframe is None:
+            self.cached_keyframe = encode({"seq": self.seq, "key": self.state})
+        return self.cached_keyframe
+
+    def reset(self):
+        # New game: the next message is a keyframe
+        self.state = {}
+        self.force_keyframe = True
+
+    def publish(self, state):
+        delta = diff_state(self.state, state)
+        if not delta and not self.force_keyframe:
+            return None
+        self.seq += 1
+        self.state = state
+        self.cached_keyframe = None
+        self.deltas_since_keyframe += 1
+
+        if self.force_keyframe or self.deltas_since_keyframe >= self.keyframe_interval:
+            self.force_keyframe = False
+            self.deltas_since_keyframe = 0
+            message = self.keyframe()
+        else:
+            message = encode({"seq": self.seq, "delta": delta})
+
+        for callback in self.subscribers:
+            callback(message)
+        return message
+
+
+class SpectatorClient:
+    # Local stand-in for a projector or phone: rebuilds the state from the feed
+    def __init__(self):
+        self.state = None
+        self.seq = 0
+        self.messages_received = 0
+        self.bytes_received = 0
+
+    def __call__(self, data):
+        self.messages_received += 1
+        self.bytes_received += len(data)
+        message = decode(data)
+        if "key" in message:
+            self.state = message["key"]
+        elif self.state is None or message["seq"] != self.seq + 1:
+            # Missed a message, wait for the next keyframe
+            self.state = None
+            return
+        else:
+            apply_delta(self.state, message["delta"])
+        self.seq = message["seq"]
@@ -0,0 +1,105 @@
+# cache.py
+
+import hashlib
+import json
+import sqlite3
+
+from rules import RULES_VERSION
+from simulation import DEFAULT_POLICIES, OUTCOMES, run_games, summarize
+
+DEFAULT_PATH = "simulation_cache.db"
+MAX_ENTRIES = 1000  # Least recently used setups are evicted past this many
+
+
+def setup_key(role_names, policies=None):
+    # Seat order doesn't matter, so the role list is hashed as a sorted multiset
+    canonical = json.dumps([sorted(role_names), RULES_VERSION, policies_key(policies)])
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+def policies_key(policies=None):
+    # Results only carry over between the same bots: each side's policy class and settings
+    policies = policies or DEFAULT_POLICIES
+    return [
+        [
+            side,
+            f"{type(policy).__module__}.{type(policy).__qualname__}",
+            repr(sorted(vars(policy).items())),
+        ]
+        for side, policy in sorted(policies.items())
+    ]
+
+
+def run_numbered_games(role_names, first_game, games, seed, policies=None):
+    # Game i of a seeded run always plays with the seed (seed, i), so a cached run
+    # can be topped up with the games it doesn't have yet
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    for index in range(first_game, first_game + games):
+        for outcome, count in run_games(role_names, 1, f"{seed}:{index}", policies).items():
+            counts[outcome] += count
+    return counts
+
+
+class ResultCache:
+    # Disk-backed LRU cache of simulation results per role setup
+    def __init__(self, path=DEFAULT_PATH, max_entries=MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path)
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, counts TEXT NOT NULL, last_used INTEGER NOT NULL)"
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)"
+        )
+        row = self.connection.execute("SELECT MAX(last_used) FROM results").fetchone()
+        self.clock = row[0] or 0  # Increases on every use, orders entries for eviction
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def get(self, role_names, policies=None):
+        key = setup_key(role_names, policies)
+        row = self.connection.execute(
+            "SELECT counts FROM results WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self.connection:
+            self.connection.execute(
+                "UPDATE results SET last_used = ? WHERE key = ?", (self.tick(), key)
+            )
+        return summarize(json.loads(row[0]))
+
+    def put(self, role_names, counts, policies=None):
+        key = setup_key(role_names, policies)
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO results (key, counts, last_used) VALUES (?, ?, ?)",
+                (key, json.dumps(counts), self.tick()),
+            )
+            self.connection.execute(
+                "DELETE FROM results WHERE key IN ("
+                "SELECT key FROM results ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def estimate(self, role_names, games=1000, seed=None, policies=None):
+        # Cached stats if there are enough games already, otherwise top them up
+        cached = self.get(role_names, policies)
+        counts = cached["outcomes"] if cached else {o: 0 for o in OUTCOMES}
+        if cached and cached["games"] >= games:
+            return cached
+        played = sum(counts.values())
+        if seed is None:
+            extra = run_games(role_names, games - played, None, policies)
+        else:
+            extra = run_numbered_games(role_names, played, games - played, seed, policies)
+        for outcome in OUTCOMES:
+            counts[outcome] += extra[outcome]
+        self.put(role_names, counts, policies)
+        return summarize(counts)
+
+    def close(self):
+        self.connection.close()
@@ -0,0 +1,159 @@
+# estimator.py
+
+import itertools
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from roles import Hunter, role_from_name
+from players import Player
+from rules import GameRules
+from simulation import (
+    DEFAULT_POLICIES,
+    MAX_NIGHTS,
+    OUTCOMES,
+    WINNER_SIDES,
+    play_day,
+    play_night,
+    summarize,
+)
+
+# Live win estimate for a game in progress: the current state is played out many
+# times by bots in a worker process, in small batches so the estimate firms up while
+# people watch. Every new state starts a new run and makes the old one stale.
+
+BATCH_GAMES = 50
+MAX_GAMES = 2000
+PRECISION = 0.02  # Stop once every side's win rate is known to +/- this
+
+
+def game_state(rules, day_next):
+    # Plain data to rebuild the game in another process. day_next: the next thing
+    # to happen is a day vote rather than a night.
+    players = []
+    for player in rules.players:
+        bullets = None
+        if isinstance(player.role, Hunter):
+            bullets = (player.role.normal_bullets, player.role.silver_bullets)
+        players.append((player.role.name, player.alive, player.disabled, bullets))
+    return {"night": rules.night_count, "players": players, "day_next": day_next}
+
+
+def rebuild_game(state):
+    players = []
+    for i, (role_name, alive, disabled, bullets) in enumerate(state["players"]):
+        player = Player(player_id=i + 1)
+        player.assign_role(role_from_name(role_name))
+        player.alive = alive
+        player.reported_dead = not alive
+        player.disabled = disabled
+        if bullets:
+            player.role.normal_bullets, player.role.silver_bullets = bullets
+        players.append(player)
+    rules = GameRules(players, logging=False)
+    rules.night_count = state["night"]
+    return rules
+
+
+def play_out(state, rng, policies=None):
+    policies = policies or DEFAULT_POLICIES
+    rules = rebuild_game(state)
+    last_night = state["night"] + MAX_NIGHTS
+    winner = rules.check_win_condition()
+    if not winner and state["day_next"]:
+        play_day(rules, policies, rng)
+        rules.reset_night_actions()
+        winner = rules.forced_outcome()
+    while not winner and rules.night_count < last_night:
+        play_night(rules, policies, rng)
+        winner = rules.check_win_condition()
+        if winner:
+            break
+        play_day(rules, policies, rng)
+        rules.reset_night_actions()
+        winner = rules.forced_outcome()
+    return WINNER_SIDES.get(winner, "draw")
+
+
+def play_out_batch(state, games, seed):
+    # Runs in the worker process
+    rng = random.Random(seed)
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    for _ in range(games):
+        counts[play_out(state, rng)] += 1
+    return counts
+
+
+def settled(summary, precision=PRECISION):
+    if summary["games"] >= MAX_GAMES:
+        return True
+    return all((high - low) / 2 <= precision for low, high in summary["intervals"].values())
+
+
+class LiveEstimator:
+    # on_update(summary) is called with the running estimate after every batch.
+    # schedule(callback) must run callback on the caller's thread, e.g. through the
+    # Kivy Clock; batches finish on a pool thread.
+    def __init__(self, on_update, schedule):
+        self.on_update = on_update
+        self.schedule = schedule
+        self.pool = None  # Started with the first estimate
+        self.run = 0
+        self.counts = None
+        self.future = None
+        self.paused = False
+        self.waiting = None  # (run, state) of the batch held back while paused
+        self.seeds = itertools.count(random.randrange(1 << 30))
+
+    def start(self, rules, day_next):
+        self.cancel()
+        if rules.check_win_condition():
+            return
+        self.counts = {outcome: 0 for outcome in OUTCOMES}
+        self.submit(self.run, game_state(rules, day_next))
+
+    def submit(self, run, state):
+        if self.paused:
+            self.waiting = (run, state)
+            return
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(max_workers=1)
+        self.future = self.pool.submit(play_out_batch, state, BATCH_GAMES, next(self.seeds))
+        self.future.add_done_callback(
+            lambda future: self.schedule(lambda: self.batch_done(run, state, future))
+        )
+
+    def batch_done(self, run, state, future):
+        if run != self.run or future.cancelled():
+            return  # A newer state has taken over
+        for outcome, count in future.result().items():
+            self.counts[outcome] += count
+        summary = summarize(self.counts)
+        self.on_update(summary)
+        if not settled(summary):
+            self.submit(run, state)
+
+    def pause(self):
+        # The batch in flight still finishes, but the next one waits for resume
+        self.paused = True
+
+    def resume(self):
+        self.paused = False
+        if self.waiting:
+            run, state = self.waiting
+            self.waiting = None
+            if run == self.run:
+                self.submit(run, state)
+
+    def cancel(self):
+        # Makes the current run stale; a batch that hasn't started is dropped
+        self.run += 1
+        self.waiting = None
+        if self.future:
+            self.future.cancel()
+            self.future = None
+
+    def shutdown(self):
+        self.cancel()
+        if self.pool:
+            self.pool.shutdown(wait=False, cancel_futures=True)
+            self.pool = None
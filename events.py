@@ -0,0 +1,111 @@
+# events.py
+
+# Logbook events are stored as compact tuples (code, actor_id, target_id, night)
+# and only turned into text when someone reads or exports the log.
+
+NIGHT_START = 0
+DON_TARGET = 1
+DON_NO_TARGET = 2
+MAFIA_TARGET = 3
+MAFIA_NO_TARGET = 4
+NO_MAFIA = 5
+DOCTOR_HEAL = 6
+DOCTOR_NO_TARGET = 7
+SILVER_KILL = 8
+SILVER_NO_EFFECT = 9
+NORMAL_KILL = 10
+NORMAL_NO_EFFECT = 11
+NO_BULLETS = 12
+CHECK_BLOODY_RED = 13
+CHECK_RED = 14
+CHECK_BLACK = 15
+HUNTER_NO_ACTION = 16
+WITCH_DISABLE = 17
+WITCH_NO_TARGET = 18
+OCCULTIST_DISABLE = 19
+GHOST_ELIMINATED = 20
+OCCULTIST_NO_TARGET = 21
+MANIAC_KILL = 22
+MANIAC_NO_TARGET = 23
+HEALED = 24
+GHOST_SURVIVED = 25
+MAFIA_KILL = 26
+SUMMARY = 27
+FOUND_DEAD = 28
+UNABLE_TO_ACT = 29
+NIGHT_END = 30
+VOTED_OUT = 31
+
+TEMPLATES = {
+    NIGHT_START: "Night {night} Actions:",
+    DON_TARGET: "Don Mafia targeted {target}",
+    DON_NO_TARGET: "Don Mafia did not select a target",
+    MAFIA_TARGET: "Mafias collectively targeted {target}",
+    MAFIA_NO_TARGET: "Mafias did not select a target",
+    NO_MAFIA: "No Mafias alive to select a target",
+    DOCTOR_HEAL: "Doctor {actor} healed {target}",
+    DOCTOR_NO_TARGET: "Doctor {actor} did not select a target",
+    SILVER_KILL: "Hunter {actor} used silver bullet to kill Vampire {target}",
+    SILVER_NO_EFFECT: "Silver bullet had no effect on {target}",
+    NORMAL_KILL: "Hunter {actor} used normal bullet to kill {target}",
+    NORMAL_NO_EFFECT: "Normal bullet had no effect on Vampire {target}",
+    NO_BULLETS: "Hunter {actor} has no bullets left",
+    CHECK_BLOODY_RED: "Hunter {actor} checked {target}, Bloody Red",
+    CHECK_RED: "Hunter {actor} checked {target}, Red",
+    CHECK_BLACK: "Hunter {actor} checked {target}, Black",
+    HUNTER_NO_ACTION: "Hunter {actor} did not select an action",
+    WITCH_DISABLE: "Witch disabled {target}",
+    WITCH_NO_TARGET: "Witch did not select a target",
+    OCCULTIST_DISABLE: "Occultist disabled {target}",
+    GHOST_ELIMINATED: "Ghost {target} was eliminated by Occultist",
+    OCCULTIST_NO_TARGET: "Occultist did not select a target",
+    MANIAC_KILL: "Maniac {actor} killed {target}",
+    MANIAC_NO_TARGET: "Maniac did not select a target",
+    HEALED: "{target} was attacked but healed by Doctor(s)",
+    GHOST_SURVIVED: "Ghost {target} cannot be killed by Mafia",
+    MAFIA_KILL: "{target} was killed by the Mafia",
+    SUMMARY: "SUMMARY:",
+    FOUND_DEAD: "{target} was found dead",
+    UNABLE_TO_ACT: "{target} is unable to act today",
+    NIGHT_END: "----------------------",
+    VOTED_OUT: "{target} was eliminated by voting.",
+}
+
+# Action type of each event, used to search the logbook
+ACTION_TYPES = {
+    DON_TARGET: "target",
+    DON_NO_TARGET: "target",
+    MAFIA_TARGET: "target",
+    MAFIA_NO_TARGET: "target",
+    DOCTOR_HEAL: "heal",
+    DOCTOR_NO_TARGET: "heal",
+    SILVER_KILL: "shoot",
+    SILVER_NO_EFFECT: "shoot",
+    NORMAL_KILL: "shoot",
+    NORMAL_NO_EFFECT: "shoot",
+    NO_BULLETS: "shoot",
+    CHECK_BLOODY_RED: "check",
+    CHECK_RED: "check",
+    CHECK_BLACK: "check",
+    HUNTER_NO_ACTION: "check",
+    WITCH_DISABLE: "disable",
+    WITCH_NO_TARGET: "disable",
+    OCCULTIST_DISABLE: "disable",
+    OCCULTIST_NO_TARGET: "disable",
+    GHOST_ELIMINATED: "kill",
+    MANIAC_KILL: "kill",
+    MANIAC_NO_TARGET: "kill",
+    MAFIA_KILL: "kill",
+    HEALED: "heal",
+    GHOST_SURVIVED: "kill",
+    FOUND_DEAD: "death",
+    UNABLE_TO_ACT: "disable",
+    VOTED_OUT: "vote",
+}
+
+
+def render_event(event, names):
+    code, actor_id, target_id, night = event
+    return TEMPLATES[code].format(
+        actor=names.get(actor_id), target=names.get(target_id), night=night
+    )
@@ -0,0 +1,1356 @@
+# game_screen.py
+
+import gc
+import sqlite3
+import time
+import weakref
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.logger import Logger
+from kivy.uix.screenmanager import Screen
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.gridlayout import GridLayout
+from kivy.uix.scrollview import ScrollView
+from kivy.uix.popup import Popup
+from kivy.uix.button import Button
+from kivy.uix.label import Label
+from kivy.uix.spinner import Spinner
+from kivy.uix.textinput import TextInput
+
+from roles import (
+    Mafia,
+    DonMafia,
+    Hunter,
+    Reborn,
+    create_role,
+    create_reborn_role,
+    get_max_role_count,
+)
+from players import Player
+from rules import GameRules, NightActionError
+from broadcast import Broadcaster
+from history import History, restore_game, snapshot_game
+from logindex import parse_query
+from profiles import ProfileStore
+from memreport import MemoryReport
+from archive import archive_game
+from estimator import LiveEstimator
+
+BUTTONS_PER_FRAME = 6  # Player grid buttons built per frame in setup_game
+LEAK_CHECK = False  # Log game objects that are still alive after teardown_game
+
+# Phases that only wait on the table go idle until someone touches the screen: the
+# live estimate stops starting new batches, so no background work or redraws
+# happen while nothing changes on the table.
+IDLE_PHASES = ["Day", "Discussion"]
+IDLE_DELAY = 10  # Seconds without input before going idle
+CPU_REPORT = False  # Log the CPU share of every idle and active stretch
+# Trace allocations for the memory report, shown with F12 or from the logbook.
+# Off by default: tracemalloc slows every allocation down while it runs.
+MEMORY_REPORT = False
+MEMORY_REPORT_KEY = 293  # F12
+# Win estimate on the phase label, played out by bots in a worker process. A new
+# estimate starts at each of these phases; True when the next thing is a day vote.
+LIVE_ESTIMATE = True
+ESTIMATE_PHASES = {"Night": False, "Day": True}
+
+# Widgets the screen hangs on players during a game
+PLAYER_UI_ATTRS = [
+    "button",
+    "role_popup",
+    "reborn_popup",
+    "action_popup",
+    "hunter_action_popup",
+    "bullet_choice_popup",
+    "shoot_target_popup",
+    "vote_popup",
+]
+
+NEXT_PHASE_TEXT = {
+    "Day": "Start Discussion",
+    "Discussion": "Start Voting",
+    "Voting": "Confirm Votes",
+    "Revote": "Confirm Votes",
+}
+
+
+class GameScreen(Screen):
+    def __init__(self, **kwargs):
+        super(GameScreen, self).__init__(**kwargs)
+        self.players = []
+        self.game_rules = None
+        self.current_phase = "Role Assignment"
+        self.layout = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        self.add_widget(self.layout)
+        self.log_button = None
+        self.fast_night = False  # Enter the whole night on one screen
+        self.broadcaster = Broadcaster()  # Spectator feed, outlives single games
+        self.night_summary = []
+        self.grid_build_event = None
+        self.history = History()
+        self.night_schedule = []
+        self.current_night_role_index = 0
+        self.tied_players = []
+        self.voters = []  # Players who already voted this round
+        self.button_pool = []  # Player buttons kept for the next game
+        self.pending_buttons = []
+        self.on_grid_ready = None
+        self.pending_reborns = []  # Dealt Reborns still to pick a side before night 1
+        self.leak_refs = []
+        # Night resolution runs here, off the UI thread; one worker keeps nights in order
+        self.night_executor = ThreadPoolExecutor(max_workers=1)
+        # Called on the worker after each night as listener(game_rules, summary_lines),
+        # for saving the log or post-night analysis. Must not touch widgets.
+        self.night_listeners = []
+        self.idle = False
+        self.idle_event = None
+        self.cpu_start = None  # (wall time, CPU time) when the current stretch began
+        self.seat_profiles = {}  # player_id -> profile name of the regular in that seat
+        self.profile_store = None  # Opened on the worker when the first game ends
+        self.memory = MemoryReport()
+        if MEMORY_REPORT:
+            self.memory.start()
+        self.estimate_text = ""
+        self.estimator = LiveEstimator(
+            self.show_estimate, lambda callback: Clock.schedule_once(lambda dt: callback())
+        )
+
+    def on_enter(self):
+        Window.bind(on_touch_down=self.on_user_input, on_key_down=self.on_user_input)
+        if MEMORY_REPORT:
+            Window.bind(on_key_down=self.on_debug_key)
+        self.arm_idle()
+
+    def on_leave(self):
+        Window.unbind(on_touch_down=self.on_user_input, on_key_down=self.on_user_input)
+        if MEMORY_REPORT:
+            Window.unbind(on_key_down=self.on_debug_key)
+        self.stop_idle()
+
+    def on_debug_key(self, window, key, *args):
+        if key == MEMORY_REPORT_KEY:
+            self.arm_idle()
+            self.show_memory_report()
+            return True
+
+    def on_user_input(self, *args):
+        # Any touch or key ends idle mode; the event carries on
+        self.arm_idle()
+
+    def arm_idle(self):
+        # Out of idle mode now, and idle again after IDLE_DELAY in a waiting phase
+        self.stop_idle()
+        if self.current_phase in IDLE_PHASES:
+            self.idle_event = Clock.schedule_once(self.enter_idle, IDLE_DELAY)
+
+    def stop_idle(self):
+        if self.idle_event:
+            self.idle_event.cancel()
+            self.idle_event = None
+        if self.idle:
+            self.estimator.resume()
+            self.idle = False
+            self.cpu_mark("idle")
+
+    def enter_idle(self, dt):
+        self.idle_event = None
+        self.cpu_mark("active")
+        # Nobody is watching the estimate firm up, so no new batches start until
+        # the next input; Kivy already skips redraws while nothing changes
+        self.estimator.pause()
+        self.idle = True
+
+    def cpu_mark(self, stretch):
+        # Ends a stretch and, with CPU_REPORT on, logs the CPU share it used
+        now = (time.perf_counter(), time.process_time())
+        if CPU_REPORT and self.cpu_start:
+            wall = now[0] - self.cpu_start[0]
+            share = 100 * (now[1] - self.cpu_start[1]) / wall if wall else 0.0
+            Logger.info(f"GameScreen: {stretch} for {wall:.0f} s at {share:.1f}% CPU")
+        self.cpu_start = now
+
+    def setup_game(self, player_count, on_ready=None):
+        if self.players:
+            self.teardown_game()
+        if not self.layout.children:
+            self.build_layout()
+
+        self.players = [Player(player_id=i + 1) for i in range(player_count)]
+        self.game_rules = GameRules(self.players)
+        self.current_phase = "Role Assignment"
+        self.update_phase_label()
+        self.next_phase_button.text = "Next Phase"
+        self.next_phase_button.disabled = False
+
+        self.night_summary = []
+        self.broadcaster.reset()
+        self.publish_state()
+
+        # Player buttons are built a few per frame so the screen shows up at once
+        self.pending_buttons = list(self.players)
+        self.on_grid_ready = on_ready
+        self.build_player_buttons()
+
+    def build_layout(self):
+        # Built once and reused by every game on this screen
+        self.phase_label = Label(
+            text=f"Current Phase: {self.current_phase}", font_size="24sp"
+        )
+        self.layout.add_widget(self.phase_label)
+
+        self.player_grid = GridLayout(cols=5, spacing=10, size_hint_y=None)
+        self.player_grid.bind(minimum_height=self.player_grid.setter("height"))
+
+        scroll_view = ScrollView(size_hint=(1, 1))
+        scroll_view.add_widget(self.player_grid)
+        self.layout.add_widget(scroll_view)
+
+        self.controls = BoxLayout(
+            orientation="horizontal", size_hint_y=None, height=50, spacing=10
+        )
+
+        self.next_phase_button = Button(text="Next Phase", font_size="20sp")
+        self.next_phase_button.bind(on_press=self.next_phase)
+
+        self.log_button = Button(text="View Logbook", font_size="20sp")
+        self.log_button.bind(on_press=self.view_logbook)
+
+        self.fast_night_button = Button(
+            text=self.fast_night_text(), font_size="20sp"
+        )
+        self.fast_night_button.bind(on_press=self.toggle_fast_night)
+
+        self.undo_button = Button(text="Undo", font_size="20sp")
+        self.undo_button.bind(on_press=self.undo)
+
+        self.redo_button = Button(text="Redo", font_size="20sp")
+        self.redo_button.bind(on_press=self.redo)
+
+        self.controls.add_widget(self.next_phase_button)
+        self.controls.add_widget(self.log_button)
+        self.controls.add_widget(self.fast_night_button)
+        self.controls.add_widget(self.undo_button)
+        self.controls.add_widget(self.redo_button)
+        self.layout.add_widget(self.controls)
+
+    def build_player_buttons(self, *args):
+        batch = self.pending_buttons[:BUTTONS_PER_FRAME]
+        del self.pending_buttons[:BUTTONS_PER_FRAME]
+        for player in batch:
+            if self.button_pool:
+                # Reuse a button from an earlier game
+                btn = self.button_pool.pop()
+                btn.text = f"{player.name}\n[Role: {'Unassigned'}]"
+                btn.background_color = [1, 1, 1, 1]
+                btn.disabled = False
+            else:
+                btn = Button(
+                    text=f"{player.name}\n[Role: {'Unassigned'}]",
+                    size_hint_y=None,
+                    height=100,
+                    font_size="18sp",
+                    markup=True,
+                )
+                btn.bind(on_press=self.on_player_button_press)
+            btn.player = player
+            player.button = btn
+            self.player_grid.add_widget(btn)
+
+        if self.pending_buttons:
+            self.grid_build_event = Clock.schedule_once(self.build_player_buttons)
+        elif self.on_grid_ready:
+            on_ready = self.on_grid_ready
+            self.on_grid_ready = None
+            on_ready()
+
+    def teardown_game(self):
+        # Drop every reference the finished game holds so its objects can be freed
+        if self.grid_build_event:
+            self.grid_build_event.cancel()
+            self.grid_build_event = None
+        self.pending_buttons = []
+        self.on_grid_ready = None
+        self.pending_reborns = []
+        self.stop_idle()
+        # The estimate's worker process goes with the game; the next game starts another
+        self.estimator.shutdown()
+        self.estimate_text = ""
+
+        for player in self.players:
+            for attr in PLAYER_UI_ATTRS:
+                player.__dict__.pop(attr, None)
+        for btn in self.player_grid.children:
+            btn.player = None
+        self.button_pool.extend(self.player_grid.children)
+        self.player_grid.clear_widgets()
+
+        if LEAK_CHECK:
+            tracked = [self.game_rules] + self.players
+            tracked += [p.role for p in self.players if p.role]
+            self.leak_refs = [weakref.ref(obj) for obj in tracked]
+            Clock.schedule_once(self.report_leaks, 1)
+
+        self.players = []
+        self.game_rules = None
+        self.history = History()
+        self.night_schedule = []
+        self.current_night_role_index = 0
+        self.tied_players = []
+        self.voters = []
+        self.night_summary = []
+        self.seat_profiles = {}
+
+    def shutdown(self):
+        # App exit: stop the estimate's worker process and let pending saves finish
+        self.estimator.shutdown()
+        self.night_executor.shutdown(wait=True)
+
+    def report_leaks(self, dt):
+        gc.collect()
+        survivors = [ref() for ref in self.leak_refs if ref() is not None]
+        self.leak_refs = []
+        if survivors:
+            counts = Counter(type(obj).__name__ for obj in survivors)
+            Logger.warning(f"GameScreen: objects survived teardown: {dict(counts)}")
+        else:
+            Logger.info("GameScreen: no objects survived teardown")
+        return survivors
+
+    def start_with_roles(self, roles):
+        # Deal a fixed list of roles in seat order and go straight to the first night
+        for i, player in enumerate(self.players):
+            player.assign_role(roles[i])
+            player.button.background_color = self.get_color(player.role.color)
+            player.button.text = f"{player.name}\n[Role: {player.role.name}]"
+        self.manager.current = "game"
+        # A dealt Reborn still picks a side at the table before the first night
+        self.pending_reborns = [p for p in self.players if type(p.role) is Reborn]
+        self.start_first_night()
+
+    def start_first_night(self):
+        if self.pending_reborns:
+            self.prompt_reborn_choice(self.pending_reborns.pop(0), auto_dismiss=False)
+            return
+        self.set_phase("Night")
+        self.next_phase_button.disabled = True  # Disable during the night
+        self.night_phase()
+
+    def set_phase(self, phase):
+        self.current_phase = phase
+        self.update_estimate()
+        self.update_phase_label()
+        self.publish_state()
+        self.arm_idle()
+        if MEMORY_REPORT:
+            self.memory.mark(self.memory_label(), self.memory_sizes())
+
+    def update_phase_label(self):
+        self.phase_label.text = f"Current Phase: {self.current_phase}"
+        if self.estimate_text:
+            self.phase_label.text += f"\n{self.estimate_text}"
+
+    def update_estimate(self):
+        # The state only changes at the estimate phases; the phases in between keep
+        # the running estimate. Anything still running for an older state is cancelled.
+        if not LIVE_ESTIMATE or not self.game_rules:
+            return
+        if self.current_phase in ESTIMATE_PHASES:
+            self.estimate_text = ""
+            self.estimator.start(self.game_rules, ESTIMATE_PHASES[self.current_phase])
+        elif self.current_phase in ["Role Assignment", "Game Over"]:
+            self.estimator.cancel()
+            self.estimate_text = ""
+
+    def show_estimate(self, summary):
+        rates = summary["rates"]
+        self.estimate_text = (
+            f"Town {rates['town']:.0%} / Mafia {rates['mafia']:.0%} / "
+            f"Maniac {rates['maniac']:.0%} ({summary['games']} games)"
+        )
+        self.update_phase_label()
+
+    def memory_label(self):
+        night = self.game_rules.night_count if self.game_rules else 0
+        return f"{self.current_phase} (night {night})"
+
+    def memory_sizes(self):
+        # Counts for the memory report that aren't objects of their own
+        sizes = {
+            "undo snapshots": len(self.history.undo_stack) + len(self.history.redo_stack),
+            "pooled buttons": len(self.button_pool),
+        }
+        if self.game_rules:
+            sizes["logbook entries"] = len(self.game_rules.logbook)
+            sizes["log index postings"] = sum(
+                len(postings) for postings in self.game_rules.log_index.postings.values()
+            )
+        return sizes
+
+    def show_memory_report(self, *args):
+        if self.current_phase == "Resolving":
+            return  # The night worker is still changing the game
+        lines = self.memory.report(self.memory_label(), self.memory_sizes())
+        for line in lines:
+            Logger.info(f"GameScreen: {line}")
+        report_label = Label(text="\n".join(lines), size_hint_y=None)
+        report_label.bind(
+            width=lambda label, width: setattr(label, "text_size", (width, None)),
+            texture_size=lambda label, size: setattr(label, "height", size[1]),
+        )
+        scroll_view = ScrollView(size_hint=(1, 1))
+        scroll_view.add_widget(report_label)
+        popup = Popup(
+            title="Memory Report", content=scroll_view, size_hint=(None, None), size=(600, 500)
+        )
+        popup.open(animation=False)
+
+    def publish_state(self):
+        state = self.game_rules.public_state()
+        state["phase"] = self.current_phase
+        state["summary"] = self.night_summary
+        self.broadcaster.publish(state)
+
+    def checkpoint(self):
+        # Save the state before a moderator action so it can be undone
+        self.history.checkpoint(self.game_rules, self.screen_state())
+
+    def screen_state(self):
+        return (
+            self.current_phase,
+            self.night_schedule,
+            self.current_night_role_index,
+            tuple(self.tied_players),
+            tuple(self.voters),
+            tuple(self.night_summary),
+        )
+
+    def undo(self, instance):
+        if self.current_phase == "Resolving":
+            return
+        snapshot = self.history.undo(self.game_rules, self.screen_state())
+        if snapshot:
+            self.restore_screen_state(snapshot.extra)
+
+    def redo(self, instance):
+        if self.current_phase == "Resolving":
+            return
+        snapshot = self.history.redo(self.game_rules, self.screen_state())
+        if snapshot:
+            self.restore_screen_state(snapshot.extra)
+
+    def restore_screen_state(self, state):
+        (
+            phase,
+            self.night_schedule,
+            self.current_night_role_index,
+            tied_players,
+            voters,
+            night_summary,
+        ) = state
+        self.tied_players = list(tied_players)
+        self.game_rules.set_tied(self.tied_players if phase == "Revote" else [])
+        self.voters = list(voters)
+        self.night_summary = list(night_summary)
+        self.refresh_board(phase)
+        self.set_phase(phase)
+        if phase == "Night" and self.fast_night:
+            self.batch_night_popup()
+
+    def refresh_board(self, phase):
+        # Redraw the player buttons and controls to match a restored state
+        self.next_phase_button.text = NEXT_PHASE_TEXT.get(phase, "Next Phase")
+        self.next_phase_button.disabled = phase in ["Night", "Game Over"]
+
+        if phase == "Role Assignment":
+            for player in self.players:
+                player.button.disabled = False
+                if player.role:
+                    player.button.background_color = self.get_color(player.role.color)
+                    player.button.text = f"{player.name}\n[Role: {player.role.name}]"
+                else:
+                    player.button.background_color = [1, 1, 1, 1]
+                    player.button.text = f"{player.name}\n[Role: {'Unassigned'}]"
+            return
+
+        self.reset_player_buttons()
+        if phase == "Night" and self.current_night_role_index < len(self.night_schedule):
+            role_name, active_players = self.night_schedule[self.current_night_role_index]
+            for player in active_players:
+                player.button.disabled = player.has_acted
+        elif phase in ["Voting", "Revote"]:
+            for player in self.players:
+                player.button.disabled = not (
+                    player.alive
+                    and not player.disabled
+                    and player not in self.voters
+                    and not (phase == "Revote" and player in self.tied_players)
+                )
+
+    def fast_night_text(self):
+        return f"Fast Night: {'On' if self.fast_night else 'Off'}"
+
+    def toggle_fast_night(self, instance):
+        self.fast_night = not self.fast_night
+        self.fast_night_button.text = self.fast_night_text()
+
+    def on_player_button_press(self, instance):
+        if self.current_phase == "Role Assignment":
+            self.assign_role_popup(instance.player)
+        elif self.current_phase == "Night":
+            self.record_night_action(instance.player)
+        elif self.current_phase in ["Voting", "Revote"]:
+            self.cast_vote(instance.player)
+
+    def assign_role_popup(self, player):
+        roles = [
+            "Don Mafia",
+            "Vampire",
+            "Werewolf",
+            "Zombie",
+            "Villager",
+            "Doctor",
+            "Hunter",
+            "Witch",
+            "Occultist",
+            "Ghost",
+            "Maniac",
+            "Reborn",
+        ]
+
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        name_input = TextInput(
+            text=self.seat_profiles.get(player.player_id, ""),
+            hint_text="Regular's name (optional)",
+            multiline=False,
+            size_hint_y=None,
+            height=40,
+        )
+        name_input.bind(
+            text=lambda input_instance, text: self.set_seat_profile(player, text)
+        )
+        content.add_widget(name_input)
+        grid = GridLayout(cols=1, spacing=10, size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+
+        for role_name in roles:
+            # Check if the maximum count for the role has been reached
+            if self.role_count(role_name) < self.get_max_role_count(role_name):
+                btn = Button(text=role_name, size_hint_y=None, height=40)
+                btn.bind(
+                    on_press=lambda btn_instance, rn=role_name: self.assign_role(
+                        player, rn
+                    )
+                )
+                grid.add_widget(btn)
+
+        scroll_view = ScrollView(size_hint=(1, 1))
+        scroll_view.add_widget(grid)
+        content.add_widget(scroll_view)
+
+        popup = Popup(
+            title=f"Assign Role to {player.name}",
+            content=content,
+            size_hint=(None, None),
+            size=(300, 400),
+        )
+        popup.open()
+        player.role_popup = popup
+
+    def set_seat_profile(self, player, name):
+        # Named seats count towards that regular's profile when the game ends
+        name = name.strip()
+        if name:
+            self.seat_profiles[player.player_id] = name
+            player.name = name
+        else:
+            self.seat_profiles.pop(player.player_id, None)
+            player.name = f"Player {player.player_id}"
+        role_name = player.role.name if player.role else "Unassigned"
+        player.button.text = f"{player.name}\n[Role: {role_name}]"
+
+    def save_finished_game(self, winner):
+        # The archive and profile writes go to the worker with the nights, off the UI thread
+        self.night_executor.submit(
+            self.write_finished_game, self.game_rules, winner, dict(self.seat_profiles)
+        )
+
+    def write_finished_game(self, game_rules, winner, seat_profiles):
+        # Runs on the worker thread, which also owns the profile store's connection
+        try:
+            archive_game(game_rules, winner)
+        except (OSError, ValueError) as e:
+            Logger.error(f"GameScreen: could not archive the game: {e}")
+        if not seat_profiles:
+            return
+        try:
+            if self.profile_store is None:
+                self.profile_store = ProfileStore()
+            self.profile_store.record_game(game_rules, winner, seat_profiles)
+        except sqlite3.Error as e:
+            Logger.error(f"GameScreen: could not record profiles: {e}")
+
+    def role_count(self, role_name):
+        return sum(
+            1
+            for p in self.players
+            if p.role and p.role.name == role_name
+        )
+
+    def get_max_role_count(self, role_name):
+        return get_max_role_count(role_name)
+
+    def assign_role(self, player, role_name):
+        if role_name == "Reborn":
+            # Prompt the Reborn player to choose their alignment
+            self.prompt_reborn_choice(player)
+            return  # Exit the method after handling Reborn choice
+        role = create_role(role_name)
+        self.checkpoint()
+        player.assign_role(role)
+        player.button.background_color = self.get_color(role.color)
+        player.button.text = f"{player.name}\n[Role: {player.role.name}]"
+        player.role_popup.dismiss()
+
+    def prompt_reborn_choice(self, player, auto_dismiss=True):
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        label = Label(text="Choose your path:")
+        btn_hunter = Button(text="Become a Hunter", size_hint_y=None, height=40)
+        btn_werewolf = Button(text="Become a Werewolf", size_hint_y=None, height=40)
+
+        btn_hunter.bind(
+            on_press=lambda instance: self.set_reborn_role(player, "Hunter")
+        )
+        btn_werewolf.bind(
+            on_press=lambda instance: self.set_reborn_role(player, "Werewolf")
+        )
+
+        content.add_widget(label)
+        content.add_widget(btn_hunter)
+        content.add_widget(btn_werewolf)
+
+        popup = Popup(
+            title=f"Reborn Choice for {player.name}",
+            content=content,
+            size_hint=(None, None),
+            size=(300, 200),
+            auto_dismiss=auto_dismiss,
+        )
+        popup.open()
+        player.reborn_popup = popup
+
+    def set_reborn_role(self, player, choice):
+        self.checkpoint()
+        role = create_reborn_role(choice)
+        player.assign_role(role)
+        player.button.background_color = self.get_color(role.color)
+        player.button.text = f"{player.name}\n[Role: {player.role.name}]"
+        player.reborn_popup.dismiss()
+        if "role_popup" in player.__dict__:
+            player.role_popup.dismiss()
+        else:
+            self.start_first_night()  # Dealt by start_with_roles
+
+    def get_color(self, color_name):
+        colors = {
+            "red": [1, 0, 0, 1],
+            "darkred": [0.6, 0, 0, 1],
+            "purple": [0.5, 0, 0.5, 1],
+            "brown": [0.65, 0.16, 0.16, 1],
+            "gray": [0.5, 0.5, 0.5, 1],
+            "green": [0, 1, 0, 1],
+            "blue": [0, 0, 1, 1],
+            "pink": [1, 0.75, 0.8, 1],
+            "darkpurple": [0.4, 0, 0.4, 1],
+            "lightgray": [0.8, 0.8, 0.8, 1],
+            "black": [0, 0, 0, 1],
+            "gold": [1, 0.84, 0, 1],
+            # Add colors for new roles here
+        }
+        return colors.get(color_name.lower(), [1, 1, 1, 1])
+
+    def next_phase(self, instance):
+        if self.current_phase == "Role Assignment":
+            if any(p.role is None for p in self.players):
+                popup = Popup(
+                    title="Error",
+                    content=Label(text="Please assign roles to all players."),
+                    size_hint=(None, None),
+                    size=(400, 200),
+                )
+                popup.open()
+                return
+            self.set_phase("Night")
+            self.next_phase_button.disabled = True  # Disable during the night
+            self.night_phase()
+        elif self.current_phase == "Day":
+            self.set_phase("Discussion")
+            self.next_phase_button.text = "Start Voting"
+            popup = Popup(
+                title="Discussion Phase",
+                content=Label(text="Discussion phase started. Proceed to voting when ready."),
+                size_hint=(None, None),
+                size=(400, 200),
+            )
+            popup.open()
+        elif self.current_phase == "Discussion":
+            self.set_phase("Voting")
+            self.next_phase_button.text = "Confirm Votes"
+            self.voting_phase()
+        elif self.current_phase in ["Voting", "Revote"]:
+            result = self.game_rules.resolve_votes()
+            if isinstance(result, Player):
+                eliminated_player = result
+                eliminated_player.button.disabled = True
+                eliminated_player.button.text = f"{eliminated_player.name}\n[Role: {eliminated_player.role.name}]\n(Eliminated)"
+                eliminated_player.button.background_color = [0.5, 0.5, 0.5, 1]
+                popup = Popup(
+                    title="Player Eliminated",
+                    content=Label(text=f"{eliminated_player.name} has been eliminated."),
+                    size_hint=(None, None),
+                    size=(400, 200),
+                )
+                popup.open()
+            elif result == "Tie":
+                self.handle_tie()
+                return  # Exit the method to allow for tie handling
+
+            win_condition = self.game_rules.check_win_condition()
+            if win_condition:
+                popup = Popup(
+                    title="Game Over",
+                    content=Label(text=win_condition),
+                    size_hint=(None, None),
+                    size=(400, 200),
+                )
+                popup.bind(on_dismiss=self.return_to_main_menu)
+                popup.open()
+                self.next_phase_button.disabled = True
+                self.set_phase("Game Over")
+                self.save_finished_game(win_condition)
+            else:
+                self.game_rules.reset_night_actions()
+                self.set_phase("Night")
+                self.next_phase_button.text = "Next Phase"
+                self.next_phase_button.disabled = True  # Disable during the night
+                self.night_phase()
+
+    def return_to_main_menu(self, instance):
+        self.manager.current = "mainmenu"
+        self.teardown_game()
+
+    def night_phase(self):
+        # The night's turns are worked out once at dusk, see GameRules.night_schedule
+        self.night_schedule = self.game_rules.night_schedule()
+        self.current_night_role_index = 0
+
+        if self.fast_night:
+            self.batch_night_popup()
+            return
+
+        popup = Popup(
+            title="Night Phase",
+            content=Label(text="Night has fallen. Roles will perform their actions."),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        popup.open()
+        self.process_night_role()
+
+    def finish_night(self):
+        # All roles have acted. Input is refused while the night resolves in the background.
+        self.reset_player_buttons()
+        self.next_phase_button.disabled = True
+        # Kept to put the night back as it was if resolving it fails
+        self.unresolved_night = snapshot_game(self.game_rules, extra=self.screen_state())
+        self.set_phase("Resolving")
+        game_rules = self.game_rules
+        future = self.night_executor.submit(self.resolve_night, game_rules)
+        future.add_done_callback(
+            lambda done: Clock.schedule_once(lambda dt: self.on_night_resolved(game_rules, done))
+        )
+
+    def resolve_night(self, game_rules):
+        # Runs on the worker thread
+        night_log, summary = game_rules.execute_night_actions()
+        summary_lines = game_rules.render(summary)
+        for listener in self.night_listeners:
+            try:
+                listener(game_rules, summary_lines)
+            except Exception:
+                Logger.exception("GameScreen: night listener failed")
+        return game_rules, summary_lines
+
+    def on_night_resolved(self, game_rules, future):
+        if game_rules is not self.game_rules:
+            return  # The game was torn down while the night resolved
+        try:
+            game_rules, summary_lines = future.result()
+        except Exception as e:
+            Logger.exception("GameScreen: resolving the night failed")
+            self.night_failed(e)
+            return
+        self.reset_player_buttons()
+        self.night_summary = summary_lines
+        self.display_night_summary(self.night_summary)
+        self.set_phase("Day")
+        self.next_phase_button.text = "Start Discussion"
+        self.next_phase_button.disabled = False
+
+    def night_failed(self, error):
+        # Back to the end of the night with every input kept, so the moderator can
+        # undo the last input or try again
+        restore_game(self.game_rules, self.unresolved_night)
+        (
+            phase,
+            self.night_schedule,
+            self.current_night_role_index,
+            tied_players,
+            voters,
+            night_summary,
+        ) = self.unresolved_night.extra
+        self.refresh_board(phase)
+        self.set_phase(phase)
+
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        content.add_widget(Label(text=f"The night could not be resolved:\n{error}"))
+        retry_button = Button(text="Try Again", size_hint_y=None, height=50)
+        content.add_widget(retry_button)
+        popup = Popup(
+            title="Night Failed", content=content, size_hint=(None, None), size=(500, 300)
+        )
+        retry_button.bind(on_press=lambda instance: (popup.dismiss(), self.finish_night()))
+        popup.open(animation=False)
+
+    def process_night_role(self):
+        if self.current_night_role_index >= len(self.night_schedule):
+            self.finish_night()
+            return
+
+        role_name, active_players = self.night_schedule[self.current_night_role_index]
+
+        # Highlight active players
+        for player in self.players:
+            if player in active_players:
+                player.button.background_color = self.get_color(player.role.color)
+                player.button.disabled = False
+            else:
+                player.button.disabled = True
+        # Display prompt for current role
+        role_prompt = Popup(
+            title=f"{role_name}'s Turn",
+            content=Label(text=f"{role_name}, please select your action."),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        role_prompt.open()
+
+    def next_night_role(self):
+        self.current_night_role_index += 1
+        self.reset_player_buttons()
+        self.process_night_role()
+
+    def batch_night_popup(self):
+        self.reset_player_buttons()
+        alive_players = [p for p in self.players if p.alive]
+        # Names can repeat, so targets are picked by seat
+        targets_by_seat = {self.seat_label(p): p for p in alive_players}
+
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        scroll_view = ScrollView(size_hint=(1, 1))
+        grid = GridLayout(cols=3, spacing=10, size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+
+        rows = []
+        for player in self.game_rules.night_actors(self.night_schedule):
+            grid.add_widget(
+                Label(
+                    text=f"{self.seat_label(player)}\n({player.role.name})",
+                    size_hint_y=None,
+                    height=40,
+                )
+            )
+            if isinstance(player.role, Hunter):
+                action = Spinner(
+                    text="Check",
+                    values=["Check", "Normal Bullet", "Silver Bullet"],
+                    size_hint_y=None,
+                    height=40,
+                )
+            else:
+                action = Label(text="Target", size_hint_y=None, height=40)
+            target = Spinner(
+                text="No Target",
+                values=["No Target"]
+                + [self.seat_label(p) for p in self.game_rules.night_targets(player)],
+                size_hint_y=None,
+                height=40,
+            )
+            grid.add_widget(action)
+            grid.add_widget(target)
+            rows.append((player, action, target))
+
+        scroll_view.add_widget(grid)
+        content.add_widget(scroll_view)
+        # The popup is modal, so it carries its own undo and redo
+        buttons = BoxLayout(orientation="horizontal", spacing=10, size_hint=(1, 0.1))
+        undo_button = Button(text="Undo", disabled=not self.history.can_undo())
+        redo_button = Button(text="Redo", disabled=not self.history.can_redo())
+        submit_button = Button(text="Resolve Night")
+        buttons.add_widget(undo_button)
+        buttons.add_widget(redo_button)
+        buttons.add_widget(submit_button)
+        content.add_widget(buttons)
+
+        popup = Popup(
+            title=f"Night {self.game_rules.night_count + 1}",
+            content=content,
+            size_hint=(None, None),
+            size=(600, 500),
+            auto_dismiss=False,
+        )
+        submit_button.bind(
+            on_press=lambda instance: self.submit_batch_night(
+                popup, rows, targets_by_seat
+            )
+        )
+        undo_button.bind(on_press=lambda instance: self.batch_history_step(popup, self.undo))
+        redo_button.bind(on_press=lambda instance: self.batch_history_step(popup, self.redo))
+        popup.open(animation=False)
+
+    def seat_label(self, player):
+        return f"{player.player_id}. {player.name}"
+
+    def batch_history_step(self, popup, step):
+        # Close the night popup and undo or redo; restoring a night opens a fresh one
+        popup.dismiss(animation=False)
+        step(None)
+
+    def submit_batch_night(self, popup, rows, targets_by_seat):
+        bullet_types = {"Normal Bullet": "normal", "Silver Bullet": "silver"}
+        records = []
+        for player, action, target in rows:
+            if target.text == "No Target":
+                continue
+            bullet_type = bullet_types.get(action.text)
+            kind = self.game_rules.default_action_kind(player, bullet_type)
+            records.append((player, kind, targets_by_seat[target.text], bullet_type))
+
+        if not self.apply_night_actions(records):
+            return
+        popup.dismiss(animation=False)
+        self.finish_night()
+
+    def apply_night_actions(self, records):
+        # Hands night input to GameRules as one undoable step; shows every error if refused
+        self.checkpoint()
+        try:
+            self.game_rules.set_night_actions(records)
+        except NightActionError as e:
+            self.history.cancel_checkpoint()
+            error_popup = Popup(
+                title="Invalid Night Actions",
+                content=Label(text="\n".join(e.errors)),
+                size_hint=(None, None),
+                size=(500, 300),
+            )
+            error_popup.open(animation=False)
+            return False
+        return True
+
+    def record_night_action(self, player):
+        if not player.alive or player.has_acted:
+            return
+
+        if isinstance(player.role, Hunter):
+            # Hunter has a choice to shoot or check
+            content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+            btn_check = Button(text="Check a Player", size_hint_y=None, height=40)
+            btn_shoot = Button(text="Shoot a Player", size_hint_y=None, height=40)
+
+            btn_check.bind(
+                on_press=lambda instance: self.hunter_check(player)
+            )
+            btn_shoot.bind(
+                on_press=lambda instance: self.hunter_shoot(player)
+            )
+
+            content.add_widget(btn_check)
+            content.add_widget(btn_shoot)
+
+            popup = Popup(
+                title="Hunter Action",
+                content=content,
+                size_hint=(None, None),
+                size=(300, 200),
+            )
+            popup.open()
+            player.hunter_action_popup = popup
+            return
+
+        if isinstance(player.role, Mafia) and any(
+            p.has_acted for p in self.players if p.alive and isinstance(p.role, Mafia)
+        ):
+            # Mafias act collectively; another Mafia has already chosen the target
+            player.has_acted = True
+            self.check_all_players_acted()
+            return
+
+        # Eligible targets for the player's role, see GameRules.night_target_mask
+        valid_targets = self.game_rules.night_targets(player)
+
+        if not valid_targets:
+            player.has_acted = True
+            self.check_all_players_acted()
+            return
+
+        # Create popup for selecting targets
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        scroll_view = ScrollView(size_hint=(1, None), size=(300, 400))
+        grid = GridLayout(cols=1, spacing=10, size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+
+        for target in valid_targets:
+            btn = Button(
+                text=f"{target.name} ({target.role.name})", size_hint_y=None, height=40
+            )
+            btn.bind(
+                on_press=lambda btn_instance, t=target: self.set_night_action(
+                    player, t
+                )
+            )
+            grid.add_widget(btn)
+
+        scroll_view.add_widget(grid)
+        content.add_widget(scroll_view)
+
+        popup = Popup(
+            title=f"{player.role.name} Action",
+            content=content,
+            size_hint=(None, None),
+            size=(350, 500),
+        )
+        popup.open()
+        player.action_popup = popup
+
+    def hunter_check(self, player):
+        player.hunter_action_popup.dismiss()
+        valid_targets = self.game_rules.night_targets(player)
+
+        if not valid_targets:
+            player.has_acted = True
+            self.check_all_players_acted()
+            return
+
+        # Create popup for selecting target to check
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        scroll_view = ScrollView(size_hint=(1, None), size=(300, 400))
+        grid = GridLayout(cols=1, spacing=10, size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+
+        for target in valid_targets:
+            btn = Button(
+                text=f"{target.name} ({target.role.name})", size_hint_y=None, height=40
+            )
+            btn.bind(
+                on_press=lambda btn_instance, t=target: self.set_night_action(
+                    player, t
+                )
+            )
+            grid.add_widget(btn)
+
+        scroll_view.add_widget(grid)
+        content.add_widget(scroll_view)
+
+        popup = Popup(
+            title="Hunter Check",
+            content=content,
+            size_hint=(None, None),
+            size=(350, 500),
+        )
+        popup.open()
+        player.action_popup = popup
+
+    def hunter_shoot(self, player):
+        player.hunter_action_popup.dismiss()
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+
+        # Bullet options
+        btn_normal = Button(text=f"Normal Bullet ({player.role.normal_bullets} left)", size_hint_y=None, height=40)
+        btn_silver = Button(text=f"Silver Bullet ({player.role.silver_bullets} left)", size_hint_y=None, height=40)
+
+        btn_normal.bind(
+            on_press=lambda instance: self.select_shoot_target(player, "normal")
+        )
+        btn_silver.bind(
+            on_press=lambda instance: self.select_shoot_target(player, "silver")
+        )
+
+        content.add_widget(btn_normal)
+        content.add_widget(btn_silver)
+
+        popup = Popup(
+            title="Choose Bullet Type",
+            content=content,
+            size_hint=(None, None),
+            size=(300, 200),
+        )
+        popup.open()
+        player.bullet_choice_popup = popup
+
+    def select_shoot_target(self, player, bullet_type):
+        player.bullet_choice_popup.dismiss()
+        if bullet_type == "normal" and player.role.normal_bullets == 0:
+            popup = Popup(
+                title="No Bullets",
+                content=Label(text="You have no normal bullets left."),
+                size_hint=(None, None),
+                size=(400, 200),
+            )
+            popup.open()
+            return
+        elif bullet_type == "silver" and player.role.silver_bullets == 0:
+            popup = Popup(
+                title="No Bullets",
+                content=Label(text="You have no silver bullets left."),
+                size_hint=(None, None),
+                size=(400, 200),
+            )
+            popup.open()
+            return
+
+        valid_targets = self.game_rules.night_targets(player)
+
+        if not valid_targets:
+            player.has_acted = True
+            self.check_all_players_acted()
+            return
+
+        # Create popup for selecting target to shoot
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        scroll_view = ScrollView(size_hint=(1, None), size=(300, 400))
+        grid = GridLayout(cols=1, spacing=10, size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+
+        for target in valid_targets:
+            btn = Button(
+                text=f"{target.name} ({target.role.name})", size_hint_y=None, height=40
+            )
+            btn.bind(
+                on_press=lambda btn_instance, t=target: self.set_hunter_shoot_action(
+                    player, bullet_type, t
+                )
+            )
+            grid.add_widget(btn)
+
+        scroll_view.add_widget(grid)
+        content.add_widget(scroll_view)
+
+        popup = Popup(
+            title="Select Target to Shoot",
+            content=content,
+            size_hint=(None, None),
+            size=(350, 500),
+        )
+        popup.open()
+        player.shoot_target_popup = popup
+
+    def set_hunter_shoot_action(self, player, bullet_type, target):
+        player.shoot_target_popup.dismiss()
+        if not self.apply_night_actions([(player, "shoot", target, bullet_type)]):
+            return
+        action_popup = Popup(
+            title="Action Recorded",
+            content=Label(text=f"Hunter will shoot {target.name} with a {bullet_type} bullet."),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        action_popup.open()
+        # Disable player button after action
+        player.button.disabled = True
+        action_popup.bind(on_dismiss=lambda instance: self.check_all_players_acted())
+
+    def set_night_action(self, player, target):
+        player.action_popup.dismiss()
+        kind = self.game_rules.default_action_kind(player)
+        if not self.apply_night_actions([(player, kind, target, None)]):
+            return
+        action_popup = Popup(
+            title="Action Recorded",
+            content=Label(text=f"{player.role.name} targets {target.name}."),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        action_popup.open()
+        # Proceed to next role if applicable
+        if isinstance(player.role, DonMafia):
+            action_popup.bind(on_dismiss=lambda instance: self.next_night_role())
+        else:
+            # Disable player button after action
+            player.button.disabled = True
+            action_popup.bind(on_dismiss=lambda instance: self.check_all_players_acted())
+
+    def check_all_players_acted(self):
+        role_name, active_players = self.night_schedule[self.current_night_role_index]
+        if role_name == "Mafia":
+            # Mafias act collectively, one choice covers all of them
+            done = any(p.has_acted for p in active_players)
+        else:
+            done = all(p.has_acted for p in active_players)
+        if done:
+            self.next_night_role()
+
+    def reset_player_buttons(self):
+        for player in self.players:
+            if player.alive:
+                player.button.disabled = True  # Disable buttons by default
+                player.button.background_color = self.get_color(player.role.color)
+                player.button.text = f"{player.name}\n[Role: {player.role.name}]"
+            else:
+                player.button.disabled = True
+                player.button.background_color = [0.5, 0.5, 0.5, 1]
+                player.button.text = f"{player.name}\n[Role: {player.role.name}]\n(Eliminated)"
+
+    def display_night_summary(self, summary):
+        summary_text = "\n".join(summary)
+        popup = Popup(
+            title="Night Summary",
+            content=Label(text=summary_text),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        popup.open(animation=not self.fast_night)
+
+    def voting_phase(self):
+        self.voters = []
+        # Enable voting for alive players not disabled by Witch or Occultist
+        voters = self.game_rules.voter_mask()
+        for player in self.players:
+            player.button.disabled = not voters & self.game_rules.seat_bits[player]
+
+    def cast_vote(self, player):
+        if not player.alive or player.disabled:
+            return
+        # Check if player is allowed to vote during revote
+        if self.current_phase == "Revote" and player in self.tied_players:
+            popup = Popup(
+                title="Cannot Vote",
+                content=Label(text="You cannot vote during the revote."),
+                size_hint=(None, None),
+                size=(400, 200),
+            )
+            popup.open()
+            return
+
+        # Create a ScrollView to accommodate all candidate options
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        scroll_view = ScrollView(size_hint=(1, None), size=(300, 400))
+        grid = GridLayout(cols=1, spacing=10, size_hint_y=None)
+        grid.bind(minimum_height=grid.setter("height"))
+
+        # Alive players except self and disabled, or only the tied players in a revote
+        candidates = self.game_rules.vote_targets(player)
+
+        for target in candidates:
+            btn = Button(
+                text=f"{target.name} ({target.role.name})",
+                size_hint_y=None,
+                height=40,
+            )
+            btn.bind(
+                on_press=lambda btn_instance, t=target: self.record_vote(player, t)
+            )
+            grid.add_widget(btn)
+
+        scroll_view.add_widget(grid)
+        content.add_widget(scroll_view)
+
+        popup = Popup(
+            title=f"{player.name} Votes",
+            content=content,
+            size_hint=(None, None),
+            size=(350, 500),
+        )
+        popup.open()
+        player.vote_popup = popup
+
+    def record_vote(self, player, target):
+        self.checkpoint()
+        target.votes += 1
+        self.voters.append(player)
+        player.vote_popup.dismiss()
+        popup = Popup(
+            title="Vote Recorded",
+            content=Label(text=f"{player.name} voted for {target.name}."),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        popup.open()
+        player.button.disabled = True  # Disable the button after voting to prevent multiple votes
+
+    def handle_tie(self):
+        popup = Popup(
+            title="Tie in Votes",
+            content=Label(text="There is a tie. Proceed to revote."),
+            size_hint=(None, None),
+            size=(400, 200),
+        )
+        popup.open()
+
+        # Reset votes and proceed to revote among tied players
+        max_votes = max(p.votes for p in self.players if p.alive)
+        self.tied_players = [
+            p for p in self.players if p.votes == max_votes and p.alive
+        ]
+
+        self.game_rules.set_tied(self.tied_players)
+
+        self.voters = []
+        voters = self.game_rules.voter_mask()  # Only untied, alive, non-disabled players
+        for player in self.players:
+            player.reset_votes()
+            player.button.disabled = not voters & self.game_rules.seat_bits[player]
+
+        self.set_phase("Revote")
+        self.next_phase_button.text = "Confirm Votes"
+
+    def view_logbook(self, instance):
+        if self.current_phase == "Resolving":
+            return  # The logbook is being written on the night worker
+        log_text = "\n".join(self.game_rules.logbook_lines())
+        content = BoxLayout(orientation="vertical", spacing=10, padding=10)
+        search_input = TextInput(
+            hint_text="Search: Player 7, Hunter, night 2, kill...",
+            multiline=False,
+            size_hint=(1, 0.1),
+        )
+        content.add_widget(search_input)
+        log_label = Label(text=log_text, size_hint_y=None)
+        search_input.bind(
+            text=lambda input_instance, text: self.search_logbook(log_label, text)
+        )
+        scroll_view = ScrollView(size_hint=(1, 1))
+        scroll_view.add_widget(log_label)
+        content.add_widget(scroll_view)
+        if MEMORY_REPORT:
+            memory_button = Button(text="Memory Report", size_hint=(1, 0.1))
+            memory_button.bind(on_press=self.show_memory_report)
+            content.add_widget(memory_button)
+        close_button = Button(text="Close", size_hint=(1, 0.1))
+        content.add_widget(close_button)
+        popup = Popup(
+            title="Logbook", content=content, size_hint=(None, None), size=(500, 500)
+        )
+        close_button.bind(on_press=popup.dismiss)
+        popup.open()
+
+    def search_logbook(self, log_label, text):
+        keys = parse_query(text)
+        if keys:
+            events = self.game_rules.search_logbook(keys)
+            lines = self.game_rules.render(events) or ["No matching entries."]
+        else:
+            lines = self.game_rules.logbook_lines()
+        log_label.text = "\n".join(lines)
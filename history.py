@@ -0,0 +1,186 @@
+# history.py
+
+from collections import namedtuple
+
+from roles import Hunter
+
+# One saved game state. Unchanged player states, logbook entries and recorded actions
+# are shared with the previous snapshot, so each snapshot only costs memory for what
+# changed.
+GameSnapshot = namedtuple(
+    "GameSnapshot",
+    ["night_count", "players", "log_node", "log_length", "action_node", "action_length", "extra"],
+)
+
+
+def player_state(player):
+    role = player.role
+    bullets = None
+    if isinstance(role, Hunter):
+        bullets = (role.normal_bullets, role.silver_bullets)
+    shooting = None
+    if player.shooting_action:
+        shooting = (
+            player.shooting_action["bullet_type"],
+            player.shooting_action["target"],
+        )
+    return (
+        role,
+        role.name if role else None,
+        bullets,
+        player.alive,
+        player.votes,
+        player.action_target,
+        player.disabled,
+        player.has_acted,
+        player.reported_dead,
+        player.reported_disabled,
+        shooting,
+        player.votes_received,
+        player.death_night,
+    )
+
+
+def restore_player(player, state):
+    (
+        role,
+        role_name,
+        bullets,
+        player.alive,
+        player.votes,
+        player.action_target,
+        player.disabled,
+        player.has_acted,
+        player.reported_dead,
+        player.reported_disabled,
+        shooting,
+        player.votes_received,
+        player.death_night,
+    ) = state
+    player.role = role
+    if role:
+        role.name = role_name
+    if bullets:
+        role.normal_bullets, role.silver_bullets = bullets
+    player.shooting_action = None
+    if shooting:
+        player.shooting_action = {"bullet_type": shooting[0], "target": shooting[1]}
+
+
+def snapshot_game(rules, previous=None, extra=None):
+    players = []
+    for i, player in enumerate(rules.players):
+        state = player_state(player)
+        if previous and i < len(previous.players) and previous.players[i] == state:
+            state = previous.players[i]  # Share the unchanged state
+        players.append(state)
+
+    log_node = chain(
+        rules.logbook, previous and previous.log_node, previous and previous.log_length
+    )
+    action_node = chain(
+        rules.actions, previous and previous.action_node, previous and previous.action_length
+    )
+    return GameSnapshot(
+        rules.night_count,
+        tuple(players),
+        log_node,
+        len(rules.logbook),
+        action_node,
+        len(rules.actions),
+        extra,
+    )
+
+
+def chain(entries, previous_node, previous_length):
+    # The logbook and the actions only grow between snapshots, so store just the new
+    # entries on top of the previous snapshot's chain of (parent, entries) nodes
+    if previous_node is not None and previous_length <= len(entries) and prefix_matches(
+        entries, previous_node, previous_length
+    ):
+        new_entries = tuple(entries[previous_length:])
+        return (previous_node, new_entries) if new_entries else previous_node
+    return (None, tuple(entries))
+
+
+def prefix_matches(entries, node, length):
+    while node and not node[1]:
+        node = node[0]
+    if node is None:
+        return True
+    return entries[length - 1] == node[1][-1]
+
+
+def chain_entries(node):
+    chunks = []
+    while node:
+        chunks.append(node[1])
+        node = node[0]
+    entries = []
+    for chunk in reversed(chunks):
+        entries.extend(chunk)
+    return entries
+
+
+def restore_game(rules, snapshot):
+    rules.night_count = snapshot.night_count
+    for player, state in zip(rules.players, snapshot.players):
+        restore_player(player, state)
+    if len(rules.logbook) != snapshot.log_length or not prefix_matches(
+        rules.logbook, snapshot.log_node, snapshot.log_length
+    ):
+        rules.logbook[:] = chain_entries(snapshot.log_node)
+        rules.rebuild_log_index()
+    if len(rules.actions) != snapshot.action_length or not prefix_matches(
+        rules.actions, snapshot.action_node, snapshot.action_length
+    ):
+        rules.actions[:] = chain_entries(snapshot.action_node)
+    rules.update_masks()
+
+
+class History:
+    # Unlimited undo/redo of moderator actions
+    def __init__(self):
+        self.undo_stack = []
+        self.redo_stack = []
+        self.cleared_redo = []
+        self.current = None  # Latest snapshot, the base for sharing
+
+    def capture(self, rules, extra=None):
+        self.current = snapshot_game(rules, self.current, extra)
+        return self.current
+
+    def checkpoint(self, rules, extra=None):
+        # Call right before a moderator action changes the game
+        self.undo_stack.append(self.capture(rules, extra))
+        self.cleared_redo = self.redo_stack  # Until the action is known to go through
+        self.redo_stack = []
+
+    def cancel_checkpoint(self):
+        # The action was rejected and changed nothing, so redo still applies
+        self.undo_stack.pop()
+        self.redo_stack = self.cleared_redo
+        self.cleared_redo = []
+
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def undo(self, rules, extra=None):
+        if not self.undo_stack:
+            return None
+        self.redo_stack.append(self.capture(rules, extra))
+        return self.restore(rules, self.undo_stack.pop())
+
+    def redo(self, rules, extra=None):
+        if not self.redo_stack:
+            return None
+        self.undo_stack.append(self.capture(rules, extra))
+        return self.restore(rules, self.redo_stack.pop())
+
+    def restore(self, rules, snapshot):
+        restore_game(rules, snapshot)
+        self.current = snapshot
+        return snapshot
@@ -0,0 +1,104 @@
+# logindex.py
+
+import re
+from collections import defaultdict
+
+from events import ACTION_TYPES, render_event
+from roles import ROLE_CLASSES
+
+ROLE_NAMES = {role_class: role_name for role_name, role_class in ROLE_CLASSES.items()}
+ACTION_NAMES = set(ACTION_TYPES.values())
+
+
+def role_keys(role):
+    # A Reborn Hunter is found both as "reborn (hunter)" and as "hunter"
+    names = {role.name.lower()}
+    if type(role) in ROLE_NAMES:
+        names.add(ROLE_NAMES[type(role)].lower())
+    return [("role", name) for name in names]
+
+
+def event_keys(event, roles):
+    code, actor_id, target_id, night = event
+    keys = {("night", night)}
+    if code in ACTION_TYPES:
+        keys.add(("action", ACTION_TYPES[code]))
+    for player_id in (actor_id, target_id):
+        if player_id is not None:
+            keys.add(("player", player_id))
+    if roles.get(actor_id):
+        keys.update(role_keys(roles[actor_id]))
+    return keys
+
+
+class LogIndex:
+    # Inverted index from (kind, value) keys to logbook entries. Entries are
+    # (game, position) pairs so several games can be searched at once.
+    def __init__(self):
+        self.postings = defaultdict(list)
+
+    def add(self, game, position, event, roles):
+        for key in event_keys(event, roles):
+            self.postings[key].append((game, position))
+
+    def add_events(self, game, start, events, roles):
+        for offset, event in enumerate(events):
+            self.add(game, start + offset, event, roles)
+
+    def search(self, keys):
+        # Entries matching every key, in log order
+        if not keys:
+            return []
+        lists = sorted((self.postings.get(key, []) for key in keys), key=len)
+        matches = set(lists[0])
+        for postings in lists[1:]:
+            matches.intersection_update(postings)
+            if not matches:
+                break
+        return sorted(matches)
+
+
+class GameSearch:
+    # Logbooks of several games behind one LogIndex, each game's entries filed under
+    # its game number
+    def __init__(self):
+        self.index = LogIndex()
+        self.games = {}  # game number -> (names, logbook)
+
+    def add_game(self, number, names, logbook, roles):
+        # roles: player_id -> role, for the role keys
+        self.index.add_events(number, 0, logbook, roles)
+        self.games[number] = (names, logbook)
+
+    def search(self, keys):
+        # (game number, event) for every entry matching all keys, in game order
+        return [
+            (number, self.games[number][1][position])
+            for number, position in self.index.search(keys)
+        ]
+
+    def search_text(self, text):
+        return self.search(parse_query(text))
+
+    def render(self, number, event):
+        names = {i + 1: name for i, name in enumerate(self.games[number][0])}
+        return render_event(event, names)
+
+
+def parse_query(text):
+    # "Player 7", "Hunter", "night 2", "kill" or any mix of them
+    text = text.lower()
+    keys = []
+    for match in re.finditer(r"night\s*(\d+)", text):
+        keys.append(("night", int(match.group(1))))
+    for match in re.finditer(r"player\s*(\d+)", text):
+        keys.append(("player", int(match.group(1))))
+    text = re.sub(r"(night|player)\s*\d+", " ", text)
+    for role_name in sorted(ROLE_NAMES.values(), key=len, reverse=True):
+        if role_name.lower() in text:
+            keys.append(("role", role_name.lower()))
+            text = text.replace(role_name.lower(), " ")
+    for word in text.split():
+        if word in ACTION_NAMES:
+            keys.append(("action", word))
+    return keys
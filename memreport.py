@@ -0,0 +1,98 @@
+# memreport.py
+
+import gc
+import tracemalloc
+from collections import Counter
+
+from players import Player
+from roles import Role
+
+# Where the memory of a long session goes: tracemalloc snapshots for allocations by
+# source line, plus live objects counted by category. Marks taken at phase changes
+# are diffed against the previous mark, so the growth of each night shows up.
+# Nothing is traced until start() is called.
+
+TOP_LINES = 10
+
+
+def category(obj):
+    if isinstance(obj, Player):
+        return "players"
+    if isinstance(obj, Role):
+        return "roles"
+    module = type(obj).__module__
+    if module == "kivy.uix.popup":
+        return "popups"
+    if module.startswith("kivy.uix."):
+        return "widgets"
+    return None
+
+
+def object_counts():
+    counts = Counter()
+    for obj in gc.get_objects():
+        name = category(obj)
+        if name:
+            counts[name] += 1
+    return counts
+
+
+def format_size(size):
+    sign = "-" if size < 0 else "+"
+    return f"{sign}{abs(size) / 1024:.1f} KiB"
+
+
+class MemoryReport:
+    def __init__(self, frames=1):
+        self.frames = frames
+        self.previous = None  # (label, snapshot, counts) of the last mark
+
+    def enabled(self):
+        return tracemalloc.is_tracing()
+
+    def start(self):
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def stop(self):
+        tracemalloc.stop()
+        self.previous = None
+
+    def take(self, sizes):
+        # sizes: extra counts from the caller, e.g. logbook entries
+        counts = object_counts()
+        counts.update(sizes)
+        return tracemalloc.take_snapshot(), counts
+
+    def mark(self, label, sizes=None):
+        # Call at phase changes; only the latest mark is kept
+        if not tracemalloc.is_tracing():
+            return
+        snapshot, counts = self.take(sizes or {})
+        self.previous = (label, snapshot, counts)
+
+    def report(self, label, sizes=None, top=TOP_LINES):
+        # Lines describing memory now, and what changed since the last mark
+        if not tracemalloc.is_tracing():
+            return ["Memory tracing is off."]
+        snapshot, counts = self.take(sizes or {})
+        current, peak = tracemalloc.get_traced_memory()
+        lines = [f"Traced: {current / 1024:.1f} KiB now, {peak / 1024:.1f} KiB peak"]
+        if self.previous:
+            since, previous_snapshot, previous_counts = self.previous
+            stats = snapshot.compare_to(previous_snapshot, "lineno")
+            growth = sum(stat.size_diff for stat in stats)
+            lines.append(f"{since} -> {label}: {format_size(growth)}")
+        else:
+            stats = snapshot.statistics("lineno")
+            previous_counts = Counter()
+        lines.append("Objects:")
+        for name in sorted(counts):
+            change = counts[name] - previous_counts[name]
+            lines.append(f"  {name}: {counts[name]} ({change:+d})")
+        lines.append("Top allocations:")
+        for stat in stats[:top]:
+            frame = stat.traceback[0]
+            size = getattr(stat, "size_diff", stat.size)
+            lines.append(f"  {frame.filename}:{frame.lineno} {format_size(size)}")
+        return lines
@@ -13,6 +13,8 @@ class Player:
         self.reported_dead = False  # Used for night summary
         self.reported_disabled = False  # Used for night summary
         self.shooting_action = None  # For Hunter's shooting action
+        self.votes_received = 0  # Over the whole game, for player profiles
+        self.death_night = None  # Night the player died on or was voted out after
 
     def assign_role(self, role):
         self.role = role
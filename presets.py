@@ -0,0 +1,89 @@
+# presets.py
+
+import json
+import os
+from collections import Counter
+
+from roles import ROLE_CLASSES, create_role, get_max_role_count
+from simulation import STANDARD_SETUPS
+
+# Named role setups kept on disk as {name: [role names in seat order]}. A setup is
+# checked once, when it is saved, so launching a preset only has to deal the roles.
+# The standard setups are always there, but a saved preset of the same name wins.
+
+DEFAULT_PATH = "presets.json"
+MAX_PLAYERS = 23
+
+
+def setup_errors(role_names):
+    errors = []
+    if not 1 <= len(role_names) <= MAX_PLAYERS:
+        errors.append(f"A setup needs 1 to {MAX_PLAYERS} players, not {len(role_names)}.")
+    for role_name, count in Counter(role_names).items():
+        if role_name not in ROLE_CLASSES:
+            errors.append(f"Unknown role: {role_name}.")
+        elif count > get_max_role_count(role_name):
+            errors.append(
+                f"At most {get_max_role_count(role_name)} {role_name} allowed, not {count}."
+            )
+    return errors
+
+
+def parse_roles(text):
+    # "Don Mafia, Villager x3, Doctor" -> role names, one per seat
+    role_names = []
+    for item in text.split(","):
+        item = item.strip()
+        name, _, count = item.rpartition(" x")
+        if name and count.isdigit():
+            role_names.extend([name.strip()] * int(count))
+        elif item:
+            role_names.append(item)
+    return role_names
+
+
+def standard_presets():
+    return dict(STANDARD_SETUPS)
+
+
+def read_saved(path=DEFAULT_PATH):
+    # The saved presets alone; ValueError if the file isn't a preset library
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        saved = json.load(f)
+    if not isinstance(saved, dict) or not all(
+        isinstance(role_names, list) for role_names in saved.values()
+    ):
+        raise ValueError(f"{path} is not a preset library")
+    return saved
+
+
+def load_presets(path=DEFAULT_PATH):
+    presets = standard_presets()
+    presets.update(read_saved(path))
+    return presets
+
+
+def save_preset(name, role_names, path=DEFAULT_PATH):
+    name = name.strip()
+    errors = setup_errors(role_names)
+    if not name:
+        errors.insert(0, "The preset needs a name.")
+    if errors:
+        raise ValueError("\n".join(errors))
+    try:
+        saved = read_saved(path)
+    except ValueError as e:
+        # Saving over a damaged library would lose whatever is left in it
+        raise ValueError(f"Can't save until {path} is repaired or removed:\n{e}")
+    saved[name] = list(role_names)
+    # Written aside and swapped in, so a crash can't leave half a library
+    with open(path + ".tmp", "w") as f:
+        json.dump(saved, f, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+def deal_preset(role_names):
+    # Roles in seat order; a Reborn is asked for its side by GameScreen.start_with_roles
+    return [create_role(role_name) for role_name in role_names]
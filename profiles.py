@@ -0,0 +1,123 @@
+# profiles.py
+
+import sqlite3
+import time
+
+from simulation import WINNER_SIDES, side_of
+
+DEFAULT_PATH = "profiles.db"
+
+# Regulars keep a profile across games. Each finished game adds to per-profile and
+# per-role running totals, so leaderboards read one row per profile however many
+# games were recorded. The games table is only a record of what was counted.
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS profiles ("
+    "id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)",
+    "CREATE TABLE IF NOT EXISTS games ("
+    "id INTEGER PRIMARY KEY, played_at REAL NOT NULL, winner TEXT NOT NULL, "
+    "players INTEGER NOT NULL, nights INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS profile_stats ("
+    "profile_id INTEGER PRIMARY KEY, games INTEGER NOT NULL, wins INTEGER NOT NULL, "
+    "nights INTEGER NOT NULL, votes INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS role_stats ("
+    "profile_id INTEGER NOT NULL, role TEXT NOT NULL, games INTEGER NOT NULL, "
+    "wins INTEGER NOT NULL, nights INTEGER NOT NULL, votes INTEGER NOT NULL, "
+    "PRIMARY KEY (profile_id, role)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS role_stats_role ON role_stats (role)",
+]
+
+ADD_PROFILE_STATS = (
+    "INSERT INTO profile_stats (profile_id, games, wins, nights, votes) "
+    "VALUES (?, 1, ?, ?, ?) ON CONFLICT (profile_id) DO UPDATE SET "
+    "games = games + 1, wins = wins + excluded.wins, "
+    "nights = nights + excluded.nights, votes = votes + excluded.votes"
+)
+ADD_ROLE_STATS = (
+    "INSERT INTO role_stats (profile_id, role, games, wins, nights, votes) "
+    "VALUES (?, ?, 1, ?, ?, ?) ON CONFLICT (profile_id, role) DO UPDATE SET "
+    "games = games + 1, wins = wins + excluded.wins, "
+    "nights = nights + excluded.nights, votes = votes + excluded.votes"
+)
+
+
+def seat_results(rules, winner):
+    # One (player, won, nights survived, votes received) row per seat
+    winning_side = WINNER_SIDES.get(winner)
+    rows = []
+    for player in rules.players:
+        nights = rules.night_count if player.alive else player.death_night
+        rows.append((player, side_of(player) == winning_side, nights, player.votes_received))
+    return rows
+
+
+class ProfileStore:
+    def __init__(self, path=DEFAULT_PATH):
+        self.connection = sqlite3.connect(path)
+        # WAL lets leaderboards be read while a game is being written
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        with self.connection:
+            for statement in SCHEMA:
+                self.connection.execute(statement)
+
+    def find_or_add(self, name):
+        # Inside the caller's transaction
+        self.connection.execute("INSERT OR IGNORE INTO profiles (name) VALUES (?)", (name,))
+        row = self.connection.execute(
+            "SELECT id FROM profiles WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0]
+
+    def profile_id(self, name):
+        # Looks a regular up by name, creating the profile on first use
+        with self.connection:
+            return self.find_or_add(name)
+
+    def record_game(self, rules, winner, seat_profiles):
+        # seat_profiles maps player_id to a profile name; unnamed seats aren't counted.
+        # Everything for the game is written in a single transaction.
+        seats = [
+            (seat_profiles[player.player_id], player, won, nights, votes)
+            for player, won, nights, votes in seat_results(rules, winner)
+            if seat_profiles.get(player.player_id)
+        ]
+        with self.connection:
+            self.connection.execute(
+                "INSERT INTO games (played_at, winner, players, nights) VALUES (?, ?, ?, ?)",
+                (time.time(), winner, len(rules.players), rules.night_count),
+            )
+            profile_stats = []
+            role_stats = []
+            for name, player, won, nights, votes in seats:
+                profile_id = self.find_or_add(name)
+                profile_stats.append((profile_id, int(won), nights, votes))
+                role_stats.append((profile_id, player.role.name, int(won), nights, votes))
+            self.connection.executemany(ADD_PROFILE_STATS, profile_stats)
+            self.connection.executemany(ADD_ROLE_STATS, role_stats)
+        return len(seats)
+
+    def leaderboard(self, role=None, min_games=5, limit=10):
+        # Rows of (name, games, win rate, average nights survived, average votes received)
+        if role:
+            table, where, params = "role_stats", "AND s.role = ?", [role]
+        else:
+            table, where, params = "profile_stats", "", []
+        return self.connection.execute(
+            "SELECT p.name, s.games, CAST(s.wins AS REAL) / s.games, "
+            "CAST(s.nights AS REAL) / s.games, CAST(s.votes AS REAL) / s.games "
+            f"FROM {table} s JOIN profiles p ON p.id = s.profile_id "
+            f"WHERE s.games >= ? {where} "
+            "ORDER BY CAST(s.wins AS REAL) / s.games DESC, s.games DESC LIMIT ?",
+            [min_games] + params + [limit],
+        ).fetchall()
+
+    def player_stats(self, name):
+        # Per-role rows of (role, games, wins, nights survived, votes received)
+        return self.connection.execute(
+            "SELECT s.role, s.games, s.wins, s.nights, s.votes FROM role_stats s "
+            "JOIN profiles p ON p.id = s.profile_id WHERE p.name = ? ORDER BY s.games DESC",
+            (name,),
+        ).fetchall()
+
+    def close(self):
+        self.connection.close()
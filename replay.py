@@ -0,0 +1,178 @@
+# replay.py
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from archive import DEFAULT_PATH, read_games
+from events import FOUND_DEAD, UNABLE_TO_ACT, VOTED_OUT, render_event
+from players import Player
+from roles import role_from_name
+from rules import RULES_VERSION, GameRules, NightActionError
+
+# Rules regression check: every archived game's recorded actions are played again
+# through the current GameRules, and the eliminations, night summaries and winner are
+# compared with what the archive says happened. Games are sent to a process pool in
+# chunks, with only a few chunks in flight so the archive is streamed, not loaded.
+
+CHUNK_GAMES = 200
+SUMMARY_CODES = (FOUND_DEAD, UNABLE_TO_ACT)
+
+
+def eliminations(logbook):
+    return [
+        (code, target_id, night)
+        for code, actor_id, target_id, night in logbook
+        if code in (FOUND_DEAD, VOTED_OUT)
+    ]
+
+
+def summaries(logbook):
+    # Night -> the summary read out that morning
+    nights = {}
+    for event in logbook:
+        if event[0] in SUMMARY_CODES:
+            nights.setdefault(event[3], []).append(tuple(event))
+    return nights
+
+
+def replay_game(record):
+    # Plays the recorded actions again and returns (rules, winner, problem). Like the
+    # game screen, the game is only checked for a winner after a decided vote.
+    players = []
+    for i, (name, role_name) in enumerate(zip(record["names"], record["roles"])):
+        player = Player(player_id=i + 1)
+        player.name = name
+        player.assign_role(role_from_name(role_name))
+        players.append(player)
+    by_id = {player.player_id: player for player in players}
+    rules = GameRules(players)
+
+    winner = None
+    actions = record["actions"]
+    for step, entry in enumerate(actions):
+        if entry[0] == "night":
+            records = [
+                (by_id[actor_id], kind, by_id[target_id], bullet_type)
+                for actor_id, kind, target_id, bullet_type in entry[1]
+            ]
+            try:
+                rules.set_night_actions(records)
+            except NightActionError as e:
+                problem = f"night {rules.night_count + 1} input rejected: " + "; ".join(e.errors)
+                return rules, rules.check_win_condition(), problem
+            rules.execute_night_actions()
+        elif entry[0] == "votes":
+            for player in players:
+                player.reset_votes()
+            for player_id, votes in entry[1]:
+                by_id[player_id].votes = votes
+            if rules.resolve_votes() != "Tie":
+                winner = rules.check_win_condition()
+        elif entry[0] == "dusk":
+            rules.reset_night_actions()
+        # A dusk after the deciding vote still belongs to that day, and changes nothing
+        if winner and any(later[0] != "dusk" for later in actions[step + 1 :]):
+            return rules, winner, f"game ends after night {rules.night_count}, earlier than recorded"
+    return rules, winner or rules.check_win_condition(), None
+
+
+def diff_game(record):
+    # Lines describing how the game plays out differently now; empty if it doesn't
+    rules, winner, problem = replay_game(record)
+    names = {i + 1: name for i, name in enumerate(record["names"])}
+    lines = [problem] if problem else []
+
+    recorded = eliminations(record["logbook"])
+    now = eliminations(rules.logbook)
+    if recorded != now:
+        for i, (before, after) in enumerate(itertools.zip_longest(recorded, now)):
+            if before != after:
+                lines.append(f"eliminations differ from #{i + 1}:")
+                lines.append("  recorded: " + describe(recorded[i:], names))
+                lines.append("  now:      " + describe(now[i:], names))
+                break
+
+    recorded = summaries(record["logbook"])
+    now = summaries(rules.logbook)
+    for night in sorted(set(recorded) | set(now)):
+        if recorded.get(night) != now.get(night):
+            lines.append(f"night {night} summary:")
+            lines.append("  recorded: " + describe(recorded.get(night, []), names))
+            lines.append("  now:      " + describe(now.get(night, []), names))
+
+    if winner != record["winner"]:
+        lines.append(f"winner: recorded {record['winner']}, now {winner}")
+    return lines
+
+
+def describe(events, names):
+    if not events:
+        return "(nothing)"
+    lines = []
+    for event in events:
+        code, target_id, night = event[0], event[-2], event[-1]
+        lines.append(render_event((code, None, target_id, night), names))
+    return "; ".join(lines)
+
+
+def diff_chunk(records):
+    # Runs in a worker process; (game number, rules version, diff lines) per game that differs
+    results = []
+    for number, record in records:
+        lines = diff_game(record)
+        if lines:
+            results.append((number, record.get("rules_version"), lines))
+    return results
+
+
+def replay_archive(path=DEFAULT_PATH, workers=None, limit=None, counts=None):
+    # Yields (game number, recorded rules version, diff lines) for every game that
+    # plays out differently. Totals are kept in counts, if given.
+    workers = workers or os.cpu_count() or 1
+    if counts is None:
+        counts = {}
+    counts.update(games=0, different=0, skipped=0)
+    games = itertools.islice(enumerate(read_games(path), 1), limit)
+    with ProcessPoolExecutor(workers) as pool:
+        pending = set()
+        while True:
+            chunk = []
+            for number, record in itertools.islice(games, CHUNK_GAMES):
+                if "actions" in record:
+                    chunk.append((number, record))
+                else:
+                    counts["skipped"] += 1  # Archived before actions were recorded
+            if chunk:
+                counts["games"] += len(chunk)
+                pending.add(pool.submit(diff_chunk, chunk))
+            if pending and (not chunk or len(pending) >= 2 * workers):
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    for result in future.result():
+                        counts["different"] += 1
+                        yield result
+            elif not chunk:
+                return
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay archived games under the current rules.")
+    parser.add_argument("archive", nargs="?", default=DEFAULT_PATH)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--limit", type=int, default=None, help="replay the first N games")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = {}
+    for number, version, lines in replay_archive(args.archive, args.workers, args.limit, counts):
+        print(f"Game {number} (recorded under rules v{version}):")
+        for line in lines:
+            print(f"  {line}")
+    print(
+        f"{counts['games']} games replayed under rules v{RULES_VERSION} in "
+        f"{time.perf_counter() - start:.1f} s: {counts['different']} play out differently, "
+        f"{counts['skipped']} skipped without recorded actions"
+    )
@@ -79,3 +79,63 @@ class Reborn(Role):
         super().__init__("Reborn", "gold")
 
 # Add new roles here following the same structure if needed
+
+# Role names as shown to the moderator, Mafia is shown as "Zombie"
+ROLE_CLASSES = {
+    "Don Mafia": DonMafia,
+    "Vampire": Vampire,
+    "Werewolf": Werewolf,
+    "Zombie": Mafia,
+    "Villager": Villager,
+    "Doctor": Doctor,
+    "Hunter": Hunter,
+    "Witch": Witch,
+    "Occultist": Occultist,
+    "Ghost": Ghost,
+    "Maniac": Maniac,
+    "Reborn": Reborn,
+}
+
+# Most players that may hold each role in one game
+MAX_ROLE_COUNTS = {
+    "Don Mafia": 1,
+    "Vampire": 2,
+    "Werewolf": 2,  # Reborn can become an extra Werewolf
+    "Zombie": 1,  # Renamed Mafia
+    "Villager": 7,
+    "Doctor": 2,
+    "Hunter": 2,  # Reborn can become an extra Hunter
+    "Witch": 1,
+    "Occultist": 1,
+    "Ghost": 1,
+    "Maniac": 1,
+    "Reborn": 1,
+}
+
+
+def get_max_role_count(role_name):
+    return MAX_ROLE_COUNTS.get(role_name, 0)
+
+
+def create_role(role_name):
+    return ROLE_CLASSES[role_name]()
+
+
+def create_reborn_role(choice):
+    # Reborn picks a side when the role is handed out
+    if choice == "Hunter":
+        role = Hunter()
+        role.name = "Reborn (Hunter)"
+    elif choice == "Werewolf":
+        role = Werewolf()
+        role.name = "Reborn (Werewolf)"
+    role.is_reborn = True
+    return role
+
+
+def role_from_name(role_name):
+    # Inverse of role.name, as stored in archives: "Reborn (Hunter)" and "Reborn
+    # (Werewolf)" come back as the chosen side
+    if role_name.startswith("Reborn ("):
+        return create_reborn_role(role_name[len("Reborn (") : -1])
+    return create_role(role_name)
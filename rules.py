@@ -1,13 +1,162 @@
 # rules.py
 
 from roles import *
-from players import Player
+from events import *
+from logindex import LogIndex
+
+RULES_VERSION = 2  # Bump whenever a change to the rules can change game outcomes
+
+# Night order: Don Mafia, Mafia, Vampire, Werewolf, Maniac, Hunter, Witch, Occultist, Doctor
+NIGHT_ORDER = [
+    ("DonMafia", DonMafia),
+    ("Mafia", Mafia),
+    ("Vampire", Vampire),
+    ("Werewolf", Werewolf),
+    ("Maniac", Maniac),
+    ("Hunter", Hunter),
+    ("Witch", Witch),
+    ("Occultist", Occultist),
+    ("Doctor", Doctor),
+]
+
+# What each role can do at night, first match wins; the first kind is the default
+NIGHT_ACTION_KINDS = [
+    (DonMafia, ("kill",)),
+    (Mafia, ("kill",)),
+    (Maniac, ("kill",)),
+    (Hunter, ("check", "shoot")),
+    (Witch, ("disable",)),
+    (Occultist, ("disable",)),
+    (Doctor, ("heal",)),
+]
+
+
+class NightActionError(ValueError):
+    # Raised by GameRules.set_night_actions with every problem in the submitted night
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
 
 class GameRules:
-    def __init__(self, players):
+    def __init__(self, players, logging=True):
         self.players = players
         self.night_count = 0
+        self.logbook = []  # Event tuples, see events.py
+        self.logging = logging  # Switch off for simulation runs that never read the log
+        self.log_index = LogIndex()
+        # Moderator input in play order, kept with the logbook so archived games can be
+        # replayed through later rules: ("night", inputs), ("votes", counts), ("dusk",)
+        self.actions = []
+        # Per-seat bitmasks, bit i standing for players[i]. Eligible targets are
+        # worked out with a few bit operations instead of scanning the players.
+        self.seat_bits = {player: 1 << i for i, player in enumerate(players)}
+        self.tied_mask = 0  # Set during a revote, see set_tied
+        self.update_masks()
+
+    def event_logger(self, entries):
+        # Returns a function that appends an event to entries, or ignores it with logging off
+        if not self.logging:
+            return lambda code, actor=None, target=None: None
+        night = self.night_count
+
+        def log(code, actor=None, target=None):
+            entries.append(
+                (
+                    code,
+                    actor.player_id if actor else None,
+                    target.player_id if target else None,
+                    night,
+                )
+            )
+
+        return log
+
+    def render(self, events):
+        names = {p.player_id: p.name for p in self.players}
+        return [render_event(event, names) for event in events]
+
+    def logbook_lines(self):
+        return self.render(self.logbook)
+
+    def add_to_logbook(self, events):
+        # Every logbook entry is indexed as it is added
+        roles = {p.player_id: p.role for p in self.players}
+        self.log_index.add_events("current", len(self.logbook), events, roles)
+        self.logbook.extend(events)
+
+    def rebuild_log_index(self):
+        # After the logbook was replaced wholesale, e.g. by undo
+        self.log_index = LogIndex()
+        logbook = self.logbook
         self.logbook = []
+        self.add_to_logbook(logbook)
+
+    def search_logbook(self, keys):
+        return [self.logbook[position] for game, position in self.log_index.search(keys)]
+
+    def update_masks(self):
+        # Rebuilt in one pass whenever seats change: after a night, a vote, a reset,
+        # an undo, or at dusk in case roles were assigned since
+        self.alive_mask = 0
+        self.disabled_mask = 0
+        self.mafia_mask = 0
+        self.don_mask = 0
+        for player, bit in self.seat_bits.items():
+            if player.alive:
+                self.alive_mask |= bit
+            if player.disabled:
+                self.disabled_mask |= bit
+            if player.role and player.role.is_mafia_aligned():
+                self.mafia_mask |= bit
+            if isinstance(player.role, DonMafia):
+                self.don_mask |= bit
+
+    def set_tied(self, tied_players):
+        # Restricts votes to the tied players until the revote is resolved
+        self.tied_mask = 0
+        for player in tied_players:
+            self.tied_mask |= self.seat_bits[player]
+
+    def players_in(self, mask):
+        # Seats in a mask, in seat order
+        players = []
+        while mask:
+            low = mask & -mask
+            players.append(self.players[low.bit_length() - 1])
+            mask ^= low
+        return players
+
+    def night_target_mask(self, actor):
+        # Who actor may pick tonight; 0 when they have no action of their own
+        bit = self.seat_bits[actor]
+        if not self.alive_mask & bit:
+            return 0
+        role = actor.role
+        if isinstance(role, Doctor):
+            return self.alive_mask  # Doctors may heal themselves
+        if isinstance(role, Mafia):
+            if self.don_mask & self.alive_mask:
+                return 0  # Mafias only act once Don Mafia is dead
+            return self.alive_mask & ~self.mafia_mask
+        if isinstance(role, (DonMafia, Maniac, Hunter, Witch, Occultist)):
+            return self.alive_mask & ~bit
+        return 0
+
+    def voter_mask(self):
+        # Who may vote now: alive, not disabled, and not tied in a revote
+        return self.alive_mask & ~self.disabled_mask & ~self.tied_mask
+
+    def vote_target_mask(self, voter):
+        if self.tied_mask:
+            return self.tied_mask & self.alive_mask & ~self.seat_bits[voter]
+        return self.alive_mask & ~self.disabled_mask & ~self.seat_bits[voter]
+
+    def night_targets(self, actor):
+        return self.players_in(self.night_target_mask(actor))
+
+    def vote_targets(self, voter):
+        return self.players_in(self.vote_target_mask(voter))
 
     def check_win_condition(self):
         mafia_count = sum(
@@ -33,13 +182,186 @@ class GameRules:
         else:
             return None
 
+    def night_schedule(self):
+        # The night's turns in order, as (role name, acting players), skipping roles
+        # with nobody alive to act. Built in one pass over the players.
+        actors = {role_name: [] for role_name, role_class in NIGHT_ORDER}
+        for player in self.players:
+            if not player.alive:
+                continue
+            for role_name, role_class in NIGHT_ORDER:
+                if isinstance(player.role, role_class):
+                    actors[role_name].append(player)
+                    break
+        if actors["DonMafia"]:
+            actors["Mafia"] = []  # Mafias only act collectively once Don Mafia is dead
+        self.update_masks()
+        return [
+            (role_name, actors[role_name])
+            for role_name, role_class in NIGHT_ORDER
+            if actors[role_name]
+        ]
+
+    def night_actors(self, schedule=None):
+        # Players who choose a target tonight, in night order. Vampires and
+        # Werewolves have no action of their own; Mafias act through one player.
+        actors = []
+        for role_name, role_players in schedule or self.night_schedule():
+            if role_name in ["Vampire", "Werewolf"]:
+                continue
+            if role_name == "Mafia":
+                role_players = role_players[:1]
+            actors.extend(role_players)
+        return actors
+
+    def forced_outcome(self):
+        # Checked at dusk: the winner the coming night must produce whatever anyone
+        # chooses, assuming killers always pick a town target. None while still open.
+        winner = self.check_win_condition()
+        if winner:
+            return winner
+
+        mafia = [p for p in self.players if p.alive and p.role.is_mafia_aligned()]
+        town = [
+            p
+            for p in self.players
+            if p.alive and not p.role.is_mafia_aligned() and not isinstance(p.role, Maniac)
+        ]
+        maniac_alive = any(p.alive and isinstance(p.role, Maniac) for p in self.players)
+        armed_hunters = [
+            p
+            for p in town
+            if isinstance(p.role, Hunter) and (p.role.normal_bullets or p.role.silver_bullets)
+        ]
+
+        if maniac_alive and not mafia and len(town) == 1:
+            # The Maniac kills the last villager unless a normal bullet stops them
+            last = town[0]
+            if not (isinstance(last.role, Hunter) and last.role.normal_bullets):
+                return "Maniac Wins"
+
+        if mafia and not maniac_alive and len(town) == len(mafia) + 1:
+            # One unstoppable kill away from parity: nobody can heal, shoot or survive it
+            don_alive = any(isinstance(p.role, DonMafia) for p in mafia)
+            # Without a Don, other mafia-aligned targets join the collective choice
+            single_killer = don_alive or all(
+                isinstance(p.role, (Mafia, Vampire, Werewolf)) for p in mafia
+            )
+            has_killer = don_alive or any(isinstance(p.role, Mafia) for p in mafia)
+            blockers = any(isinstance(p.role, (Doctor, Ghost)) for p in town)
+            if has_killer and single_killer and not blockers and not armed_hunters:
+                return "Mafia Wins"
+
+        return None
+
     def reset_night_actions(self):
         for player in self.players:
             player.reset_status()
+        self.tied_mask = 0
+        self.update_masks()
+        if self.logging:
+            self.actions.append(("dusk",))
+
+    def night_inputs(self):
+        # What set_night_actions accepted tonight, as (actor_id, kind, target_id, bullet_type)
+        inputs = []
+        for player in self.players:
+            if not player.alive:
+                continue
+            if player.shooting_action:
+                target = player.shooting_action["target"]
+                bullet_type = player.shooting_action["bullet_type"]
+                inputs.append((player.player_id, "shoot", target.player_id, bullet_type))
+            elif player.action_target:
+                kind = self.default_action_kind(player)
+                inputs.append((player.player_id, kind, player.action_target.player_id, None))
+        return tuple(inputs)
+
+    def action_kinds(self, actor):
+        # The night action kinds actor's role may use, empty if it has none
+        for role_class, kinds in NIGHT_ACTION_KINDS:
+            if isinstance(actor.role, role_class):
+                return kinds
+        return ()
+
+    def default_action_kind(self, actor, bullet_type=None):
+        if bullet_type is not None:
+            return "shoot"
+        kinds = self.action_kinds(actor)
+        return kinds[0] if kinds else None
+
+    def set_night_actions(self, records):
+        # Takes the whole night's input as (actor, kind, target, bullet_type) records.
+        # Everything is validated in one pass, and only applied if all of it is valid;
+        # otherwise NightActionError lists every problem found.
+        self.update_masks()
+        errors = []
+        seen = set()
+        for actor, kind, target, bullet_type in records:
+            # Records can come from outside, e.g. a remote batch; anything that isn't a
+            # seat of this game is rejected before the seat masks are looked at
+            if actor not in self.seat_bits:
+                errors.append(f"{getattr(actor, 'name', actor)} is not a player in this game")
+                continue
+            if actor in seen:
+                errors.append(f"{actor.name} can only act once per night")
+                continue
+            seen.add(actor)
+            if not actor.alive:
+                errors.append(f"{actor.name} is dead and cannot act")
+                continue
+            if actor.has_acted:
+                errors.append(f"{actor.name} has already acted tonight")
+                continue
+            if actor.disabled:
+                errors.append(f"{actor.name} is disabled and cannot act")
+                continue
+            if kind not in self.action_kinds(actor):
+                errors.append(f"{actor.role.name} cannot {kind} at night")
+                continue
+
+            if target is None:
+                errors.append(f"{actor.name} needs a target to {kind}")
+            elif target not in self.seat_bits:
+                errors.append(f"{getattr(target, 'name', target)} is not a player in this game")
+            elif not target.alive:
+                errors.append(f"{target.name} is dead and cannot be targeted")
+            elif not self.night_target_mask(actor) & self.seat_bits[target]:
+                if target is actor:
+                    errors.append(f"{actor.name} cannot target themselves")
+                elif isinstance(actor.role, Mafia) and self.don_mask & self.alive_mask:
+                    errors.append("Mafias cannot act while Don Mafia is alive")
+                else:
+                    errors.append(f"{actor.name} cannot target {target.name}")
+
+            if kind == "shoot":
+                if bullet_type == "normal" and actor.role.normal_bullets == 0:
+                    errors.append(f"Hunter {actor.name} has no normal bullets left")
+                elif bullet_type == "silver" and actor.role.silver_bullets == 0:
+                    errors.append(f"Hunter {actor.name} has no silver bullets left")
+                elif bullet_type not in ["normal", "silver"]:
+                    errors.append(f"Unknown bullet type {bullet_type}")
+            elif bullet_type is not None:
+                errors.append(f"{actor.name} can only use a bullet to shoot")
+
+        if errors:
+            raise NightActionError(errors)
+
+        for actor, kind, target, bullet_type in records:
+            if kind == "shoot":
+                actor.action_target = None
+                actor.shooting_action = {"bullet_type": bullet_type, "target": target}
+            else:
+                actor.action_target = target
+                actor.shooting_action = None
+            actor.has_acted = True
 
     def execute_night_actions(self):
+        if self.logging:
+            self.actions.append(("night", self.night_inputs()))
         self.night_count += 1
         night_log = []
+        log = self.event_logger(night_log)
         mafia_target = None
         don_mafia = None
         doctor_targets = []
@@ -56,9 +378,9 @@ class GameRules:
             don_mafia = don_mafia_players[0]
             if don_mafia.action_target and don_mafia.action_target.alive:
                 mafia_target = don_mafia.action_target
-                night_log.append(f"Don Mafia targeted {mafia_target.name}")
+                log(DON_TARGET, don_mafia, mafia_target)
             else:
-                night_log.append("Don Mafia did not select a target")
+                log(DON_NO_TARGET, don_mafia)
         else:
             # If Don Mafia is dead, Mafias can collectively select a target
             mafia_players = [
@@ -70,12 +392,12 @@ class GameRules:
                 targets = [p.action_target for p in mafia_players if p.action_target and p.action_target.alive]
                 if targets:
                     # Assuming majority vote among Mafias for target
-                    mafia_target = max(set(targets), key=targets.count)
-                    night_log.append(f"Mafias collectively targeted {mafia_target.name}")
+                    mafia_target = max(targets, key=targets.count)  # Ties go to the first pick
+                    log(MAFIA_TARGET, target=mafia_target)
                 else:
-                    night_log.append("Mafias did not select a target")
+                    log(MAFIA_NO_TARGET)
             else:
-                night_log.append("No Mafias alive to select a target")
+                log(NO_MAFIA)
 
         # Doctor selects targets
         doctor_players = [
@@ -84,9 +406,9 @@ class GameRules:
         for doctor in doctor_players:
             if doctor.action_target and doctor.action_target.alive:
                 doctor_targets.append(doctor.action_target)
-                night_log.append(f"Doctor {doctor.name} healed {doctor.action_target.name}")
+                log(DOCTOR_HEAL, doctor, doctor.action_target)
             else:
-                night_log.append(f"Doctor {doctor.name} did not select a target")
+                log(DOCTOR_NO_TARGET, doctor)
 
         # Hunter actions
         hunter_players = [
@@ -100,43 +422,33 @@ class GameRules:
                     hunter.role.silver_bullets -= 1
                     if isinstance(target.role, Vampire):
                         target.eliminate()
-                        night_log.append(
-                            f"Hunter {hunter.name} used silver bullet to kill Vampire {target.name}"
-                        )
+                        log(SILVER_KILL, hunter, target)
                     else:
-                        night_log.append(
-                            f"Silver bullet had no effect on {target.name}"
-                        )
+                        log(SILVER_NO_EFFECT, hunter, target)
                 elif bullet_type == "normal" and hunter.role.normal_bullets > 0:
                     hunter.role.normal_bullets -= 1
                     if not isinstance(target.role, Vampire):
                         target.eliminate()
-                        night_log.append(
-                            f"Hunter {hunter.name} used normal bullet to kill {target.name}"
-                        )
+                        log(NORMAL_KILL, hunter, target)
                     else:
-                        night_log.append(
-                            f"Normal bullet had no effect on Vampire {target.name}"
-                        )
+                        log(NORMAL_NO_EFFECT, hunter, target)
                 else:
-                    night_log.append(f"Hunter {hunter.name} has no bullets left")
+                    log(NO_BULLETS, hunter)
                 # Reset shooting action
                 hunter.shooting_action = None
             elif hunter.action_target and hunter.action_target.alive:
                 target = hunter.action_target
                 # Check alignment
                 if isinstance(target.role, DonMafia):
-                    alignment = "Bloody Red"
+                    alignment = CHECK_BLOODY_RED
                 elif target.role.is_mafia_aligned():
-                    alignment = "Red"
+                    alignment = CHECK_RED
                 else:
-                    alignment = "Black"
-                night_log.append(
-                    f"Hunter {hunter.name} checked {target.name}, {alignment}"
-                )
+                    alignment = CHECK_BLACK
+                log(alignment, hunter, target)
                 hunter_checks.append((hunter, target, alignment))
             else:
-                night_log.append(f"Hunter {hunter.name} did not select an action")
+                log(HUNTER_NO_ACTION, hunter)
 
         # Witch actions
         witch_players = [
@@ -147,9 +459,9 @@ class GameRules:
             if witch.action_target and witch.action_target.alive:
                 witch_target = witch.action_target
                 witch_target.disabled = True
-                night_log.append(f"Witch disabled {witch_target.name}")
+                log(WITCH_DISABLE, witch, witch_target)
             else:
-                night_log.append("Witch did not select a target")
+                log(WITCH_NO_TARGET, witch)
 
         # Occultist actions
         occultist_players = [
@@ -160,15 +472,13 @@ class GameRules:
             if occultist.action_target and occultist.action_target.alive:
                 occultist_target = occultist.action_target
                 occultist_target.disabled = True
-                night_log.append(f"Occultist disabled {occultist_target.name}")
+                log(OCCULTIST_DISABLE, occultist, occultist_target)
                 # Check if target is Ghost
                 if isinstance(occultist_target.role, Ghost):
                     occultist_target.eliminate()
-                    night_log.append(
-                        f"Ghost {occultist_target.name} was eliminated by Occultist"
-                    )
+                    log(GHOST_ELIMINATED, occultist, occultist_target)
             else:
-                night_log.append("Occultist did not select a target")
+                log(OCCULTIST_NO_TARGET, occultist)
 
         # Maniac actions
         maniac_players = [
@@ -179,59 +489,81 @@ class GameRules:
             if maniac.action_target and maniac.action_target.alive:
                 maniac_target = maniac.action_target
                 maniac_target.eliminate()
-                night_log.append(f"Maniac {maniac.name} killed {maniac_target.name}")
+                log(MANIAC_KILL, maniac, maniac_target)
             else:
-                night_log.append("Maniac did not select a target")
+                log(MANIAC_NO_TARGET, maniac)
 
         # Resolve Mafia attack
         if mafia_target and mafia_target.alive:
             if mafia_target in doctor_targets:
-                night_log.append(
-                    f"{mafia_target.name} was attacked but healed by Doctor(s)"
-                )
+                log(HEALED, target=mafia_target)
             elif isinstance(mafia_target.role, Ghost):
-                night_log.append(f"Ghost {mafia_target.name} cannot be killed by Mafia")
+                log(GHOST_SURVIVED, target=mafia_target)
             else:
                 mafia_target.eliminate()
-                night_log.append(f"{mafia_target.name} was killed by the Mafia")
+                log(MAFIA_KILL, target=mafia_target)
 
-        # Prepare summary
+        # Prepare summary, kept even with logging off since the moderator reads it out
         summary = []
         # Include all deaths and effects
         for player in self.players:
             if not player.alive and not player.reported_dead:
-                summary.append(f"{player.name} was found dead")
+                summary.append((FOUND_DEAD, None, player.player_id, self.night_count))
                 player.reported_dead = True
+                if player.death_night is None:  # Not voted out the day before
+                    player.death_night = self.night_count
             elif player.disabled and not player.reported_disabled:
-                summary.append(f"{player.name} is unable to act today")
+                summary.append((UNABLE_TO_ACT, None, player.player_id, self.night_count))
                 player.reported_disabled = True
 
-        night_log.append("SUMMARY:")
-        night_log.extend(summary)
-        night_log.append("----------------------")
+        log(SUMMARY)
+        if self.logging:
+            night_log.extend(summary)
+        log(NIGHT_END)
 
         # Add night log to the logbook
-        self.logbook.append(f"Night {self.night_count} Actions:")
-        self.logbook.extend(night_log)
+        if self.logging:
+            self.add_to_logbook([(NIGHT_START, None, None, self.night_count)] + night_log)
 
         # Reset night actions
         for player in self.players:
             player.action_target = None
+        self.update_masks()
 
         return night_log, summary
 
     def resolve_votes(self):
+        if self.logging:
+            counts = tuple((p.player_id, p.votes) for p in self.players if p.votes)
+            self.actions.append(("votes", counts))
+        for player in self.players:
+            player.votes_received += player.votes
         max_votes = max(p.votes for p in self.players if p.alive)
         candidates = [p for p in self.players if p.votes == max_votes and p.alive]
 
         if len(candidates) == 1:
             eliminated_player = candidates[0]
             eliminated_player.eliminate()
-            self.logbook.append(f"{eliminated_player.name} was eliminated by voting.")
+            eliminated_player.death_night = self.night_count
+            self.tied_mask = 0
+            self.update_masks()
+            if self.logging:
+                self.add_to_logbook(
+                    [(VOTED_OUT, None, eliminated_player.player_id, self.night_count)]
+                )
             return eliminated_player
         else:
             # Tie occurred
             return "Tie"
 
+    def public_state(self):
+        # What spectators may see: no roles and no night targets
+        return {
+            "night": self.night_count,
+            "players": len(self.players),
+            "eliminated": [p.player_id for p in self.players if not p.alive],
+            "disabled": [p.player_id for p in self.players if p.alive and p.disabled],
+        }
+
     def alive_players(self):
         return [p for p in self.players if p.alive]
@@ -0,0 +1,267 @@
+# selfplay.py
+
+import argparse
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from events import CHECK_BLACK, CHECK_BLOODY_RED, CHECK_RED
+from roles import Hunter
+from rules import RULES_VERSION
+from simulation import (
+    DEFAULT_POLICIES,
+    OUTCOMES,
+    STANDARD_SETUPS,
+    RandomPolicy,
+    play_game,
+    side_of,
+)
+
+# Self-play training of night-target and voting policies for every side. A decision
+# is described by a compact state (side, role, alive counts, bullets left) and an
+# action picks a kind of target (teammate, Hunter check result, votes received so
+# far) rather than a seat, so the tables stay small and carry over between setups.
+
+SIDES = ("town", "mafia", "maniac")
+EPSILON = 0.1  # Share of exploratory decisions while training
+ROUNDS = 20
+GAMES_PER_TASK = 200
+DEFAULT_PATH = "learned_policy.json"
+# Learned policies may send killers at teammates, which forced_outcome rules out, so
+# their games are always played to the end. They also read the logbook.
+FULL_GAMES = {"early_stop": False, "logging": True}
+
+
+def check_results(rules):
+    # Hunter check results so far by target id, assumed shared with the whole town.
+    # Read from the logbook, so games need logging on for these to show up.
+    results = {}
+    for code, actor_id, target_id, night in rules.search_logbook([("action", "check")]):
+        if code in (CHECK_RED, CHECK_BLOODY_RED):
+            results[target_id] = "red"
+        elif code == CHECK_BLACK:
+            results[target_id] = "black"
+    return results
+
+
+def state_key(rules, actor, kind):
+    counts = {side: 0 for side in SIDES}
+    for player in rules.players:
+        if player.alive:
+            counts[side_of(player)] += 1
+    role = type(actor.role).__name__ if kind == "night" else "-"
+    bullets = ""
+    if kind == "night" and isinstance(actor.role, Hunter):
+        bullets = f"n{min(actor.role.normal_bullets, 1)}s{min(actor.role.silver_bullets, 1)}"
+    return (
+        f"{side_of(actor)}|{kind}|{role}|"
+        f"t{min(counts['town'], 8)}m{min(counts['mafia'], 4)}x{counts['maniac']}|{bullets}"
+    )
+
+
+def target_kind(actor, target, checks):
+    if target is actor:
+        return "self"
+    if actor.role.is_mafia_aligned() and target.role.is_mafia_aligned():
+        return "team"  # The mafia know each other
+    return f"{checks.get(target.player_id, 'unknown')}{min(target.votes_received, 2)}"
+
+
+def action_options(actor, targets, checks, kind):
+    # Maps action names like "normal:black1" to (bullet_type, targets of that kind)
+    bullets = [None]
+    if kind == "night" and isinstance(actor.role, Hunter):
+        if actor.role.normal_bullets > 0:
+            bullets.append("normal")
+        if actor.role.silver_bullets > 0:
+            bullets.append("silver")
+    options = {}
+    for target in targets:
+        group = target_kind(actor, target, checks)
+        for bullet_type in bullets:
+            action = f"{bullet_type or 'pick'}:{group}"
+            options.setdefault(action, (bullet_type, []))[1].append(target)
+    return options
+
+
+class TablePolicy(RandomPolicy):
+    # Plays a learned lookup table of state -> action. States the table doesn't cover
+    # are played like RandomPolicy.
+    def __init__(self, table):
+        self.table = table
+
+    def best_action(self, state, options, rng):
+        action = self.table.get(state)
+        return action if action in options else None
+
+    def chose(self, state, action):
+        pass
+
+    def pick(self, rules, actor, kind, targets, rng):
+        options = action_options(actor, targets, check_results(rules), kind)
+        if not options:
+            return None
+        state = state_key(rules, actor, kind)
+        action = self.best_action(state, options, rng)
+        if action is None:
+            return None
+        self.chose(state, action)
+        bullet_type, group = options[action]
+        return rng.choice(group), bullet_type
+
+    def night_action(self, rules, actor, rng):
+        choice = self.pick(rules, actor, "night", rules.night_targets(actor), rng)
+        return choice or super().night_action(rules, actor, rng)
+
+    def vote(self, rules, voter, candidates, rng):
+        choice = self.pick(rules, voter, "vote", candidates, rng)
+        return choice[0] if choice else super().vote(rules, voter, candidates, rng)
+
+
+class LearningPolicy(TablePolicy):
+    # Epsilon-greedy over running mean rewards; records its decisions for the update
+    def __init__(self, values, epsilon, trace):
+        self.values = values  # state -> {action: [total reward, visits]}
+        self.epsilon = epsilon
+        self.trace = trace
+
+    def best_action(self, state, options, rng):
+        if rng.random() < self.epsilon:
+            return rng.choice(sorted(options))
+        seen = self.values.get(state, {})
+
+        def score(action):
+            # Untried actions look best, so each gets tried at least once
+            if action not in seen:
+                return 2.0
+            total, visits = seen[action]
+            return total / visits
+
+        return max(sorted(options), key=score)
+
+    def chose(self, state, action):
+        self.trace.append((state, action))
+
+
+def reward(side, outcome):
+    if outcome == side:
+        return 1.0
+    return 0.5 if outcome == "draw" else 0.0
+
+
+def play_episodes(role_names, values, epsilon, games, seed):
+    # Runs in a worker process. Returns reward sums to merge, in the same shape as values.
+    rng = random.Random(seed)
+    updates = {}
+    for _ in range(games):
+        traces = {side: [] for side in SIDES}
+        policies = {side: LearningPolicy(values, epsilon, traces[side]) for side in SIDES}
+        outcome = play_game(role_names, rng, policies, **FULL_GAMES).outcome
+        for side, trace in traces.items():
+            gain = reward(side, outcome)
+            for state, action in trace:
+                entry = updates.setdefault(state, {}).setdefault(action, [0.0, 0])
+                entry[0] += gain
+                entry[1] += 1
+    return updates
+
+
+def merge(values, updates):
+    for state, actions in updates.items():
+        seen = values.setdefault(state, {})
+        for action, (total, visits) in actions.items():
+            entry = seen.setdefault(action, [0.0, 0])
+            entry[0] += total
+            entry[1] += visits
+
+
+def train(setups=None, rounds=ROUNDS, workers=None, seed=0, epsilon=EPSILON):
+    # Every round plays a batch of games per worker and setup against the values
+    # learned so far, then folds the results in
+    setups = setups or STANDARD_SETUPS
+    workers = workers or os.cpu_count() or 1
+    seeds = itertools.count(seed)
+    values = {}
+    with ProcessPoolExecutor(workers) as pool:
+        for _ in range(rounds):
+            futures = [
+                pool.submit(
+                    play_episodes, role_names, values, epsilon, GAMES_PER_TASK, next(seeds)
+                )
+                for role_names in setups.values()
+                for _ in range(workers)
+            ]
+            for future in futures:
+                merge(values, future.result())
+    return values
+
+
+def greedy_table(values, min_visits=20):
+    # The lookup table to export: the best action of every state seen often enough
+    table = {}
+    for state, actions in values.items():
+        tried = {
+            action: total / visits
+            for action, (total, visits) in actions.items()
+            if visits >= min_visits
+        }
+        if tried:
+            table[state] = max(sorted(tried), key=tried.get)
+    return table
+
+
+def export_table(table, path=DEFAULT_PATH):
+    with open(path, "w") as f:
+        json.dump({"rules_version": RULES_VERSION, "table": table}, f, indent=1, sort_keys=True)
+
+
+def load_policies(path=DEFAULT_PATH):
+    # Policies for simulation.play_game; one table covers every side
+    with open(path) as f:
+        data = json.load(f)
+    if data["rules_version"] != RULES_VERSION:
+        raise ValueError(f"{path} was learned under different rules")
+    policy = TablePolicy(data["table"])
+    return {side: policy for side in SIDES}
+
+
+def evaluate(role_names, learned, games, seed=0):
+    # Win rate of each side when it alone plays the learned table, against random play
+    results = {}
+    for side in SIDES:
+        policies = dict(DEFAULT_POLICIES)
+        policies[side] = learned[side]
+        rng = random.Random(seed)
+        counts = {outcome: 0 for outcome in OUTCOMES}
+        for _ in range(games):
+            counts[play_game(role_names, rng, policies, **FULL_GAMES).outcome] += 1
+        results[side] = counts[side] / games
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Learn bot policies by self-play.")
+    parser.add_argument("--rounds", type=int, default=ROUNDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--epsilon", type=float, default=EPSILON)
+    parser.add_argument("--out", default=DEFAULT_PATH)
+    parser.add_argument("--evaluate", type=int, default=1000, help="games per side and setup")
+    args = parser.parse_args()
+
+    values = train(STANDARD_SETUPS, args.rounds, args.workers, args.seed, args.epsilon)
+    table = greedy_table(values)
+    export_table(table, args.out)
+    print(f"{len(table)} states written to {args.out}")
+
+    learned = load_policies(args.out)
+    for setup_name, role_names in STANDARD_SETUPS.items():
+        baseline = {outcome: 0 for outcome in OUTCOMES}
+        rng = random.Random(args.seed)
+        for _ in range(args.evaluate):
+            baseline[play_game(role_names, rng).outcome] += 1
+        for side, rate in evaluate(role_names, learned, args.evaluate, args.seed).items():
+            before = baseline[side] / args.evaluate
+            print(f"{setup_name:6} {side:7} random {before:.3f} learned {rate:.3f}")
@@ -0,0 +1,291 @@
+# simulation.py
+
+import math
+import random
+from collections import namedtuple
+
+from roles import DonMafia, Hunter, Maniac, create_role, create_reborn_role
+from players import Player
+from rules import GameRules
+
+MAX_NIGHTS = 50  # Games still running after this many nights count as a draw
+
+# Outcome of a simulated game, by side; "draw" when nobody won in time
+OUTCOMES = ("town", "mafia", "maniac", "draw")
+WINNER_SIDES = {"Villagers Win": "town", "Mafia Wins": "mafia", "Maniac Wins": "maniac"}
+
+GameResult = namedtuple("GameResult", ["outcome", "nights"])
+
+# The fixed setups behind the menu's Small Game and Big Game buttons
+STANDARD_SETUPS = {
+    "small": ["Don Mafia", "Villager", "Witch", "Doctor", "Hunter"],
+    "big": [
+        "Don Mafia",
+        "Vampire",
+        "Vampire",
+        "Werewolf",
+        "Werewolf",
+        "Zombie",
+        "Villager",
+        "Villager",
+        "Villager",
+        "Villager",
+        "Villager",
+        "Villager",
+        "Villager",
+        "Doctor",
+        "Doctor",
+        "Hunter",
+        "Hunter",
+        "Witch",
+        "Occultist",
+        "Ghost",
+        "Maniac",
+        "Reborn",
+        "Zombie",
+    ],
+}
+
+
+def side_of(player):
+    if player.role.is_mafia_aligned():
+        return "mafia"
+    if isinstance(player.role, Maniac):
+        return "maniac"
+    return "town"
+
+
+class RandomPolicy:
+    # Picks uniformly among the choices a real player at the table could make
+    hunter_shoot_chance = 0.3
+
+    def night_action(self, rules, actor, rng):
+        # Returns (target, bullet_type) or None to skip the action
+        mask = rules.night_target_mask(actor)
+        if isinstance(actor.role, DonMafia):
+            mask &= ~rules.mafia_mask  # Never worth killing a teammate
+        targets = rules.players_in(mask)
+        if not targets:
+            return None
+
+        bullet_type = None
+        if isinstance(actor.role, Hunter):
+            bullets = []
+            if actor.role.normal_bullets > 0:
+                bullets.append("normal")
+            if actor.role.silver_bullets > 0:
+                bullets.append("silver")
+            if bullets and rng.random() < self.hunter_shoot_chance:
+                bullet_type = rng.choice(bullets)
+        return rng.choice(targets), bullet_type
+
+    def vote(self, rules, voter, candidates, rng):
+        if voter.role.is_mafia_aligned():
+            town = [p for p in candidates if not p.role.is_mafia_aligned()]
+            if town:
+                candidates = town
+        return rng.choice(candidates)
+
+
+DEFAULT_POLICIES = {side: RandomPolicy() for side in ("town", "mafia", "maniac")}
+
+
+def deal_roles(role_names, rng):
+    roles = []
+    for role_name in role_names:
+        if role_name == "Reborn":
+            roles.append(create_reborn_role(rng.choice(["Hunter", "Werewolf"])))
+        else:
+            roles.append(create_role(role_name))
+    return roles
+
+
+def new_game(role_names, rng, logging=False):
+    players = [Player(player_id=i + 1) for i in range(len(role_names))]
+    for player, role in zip(players, deal_roles(role_names, rng)):
+        player.assign_role(role)
+    return GameRules(players, logging=logging)
+
+
+def play_night(rules, policies, rng):
+    records = []
+    for actor in rules.night_actors():
+        choice = policies[side_of(actor)].night_action(rules, actor, rng)
+        if choice:
+            target, bullet_type = choice
+            kind = rules.default_action_kind(actor, bullet_type)
+            records.append((actor, kind, target, bullet_type))
+    rules.set_night_actions(records)
+    rules.execute_night_actions()
+
+
+def cast_votes(rules, policies, rng, voters):
+    for voter in voters:
+        options = rules.vote_targets(voter)
+        if options:
+            policies[side_of(voter)].vote(rules, voter, options, rng).votes += 1
+
+
+def play_day(rules, policies, rng):
+    # Same flow as GameScreen: vote, then one revote among the tied players
+    cast_votes(rules, policies, rng, rules.players_in(rules.voter_mask()))
+    result = rules.resolve_votes()
+    if result == "Tie":
+        max_votes = max(p.votes for p in rules.players if p.alive)
+        rules.set_tied([p for p in rules.players if p.alive and p.votes == max_votes])
+        for player in rules.players:
+            player.reset_votes()
+        cast_votes(rules, policies, rng, rules.players_in(rules.voter_mask()))
+        result = rules.resolve_votes()  # A second tie eliminates nobody
+    return result
+
+
+def play_game(role_names, rng=None, policies=None, early_stop=True, logging=False):
+    # With early_stop the game ends as soon as GameRules.forced_outcome settles it.
+    # Policies that read the logbook, like the self-play ones, need logging on.
+    rng = rng or random.Random()
+    policies = policies or DEFAULT_POLICIES
+    rules = new_game(role_names, rng, logging)
+
+    winner = rules.forced_outcome() if early_stop else rules.check_win_condition()
+    while not winner and rules.night_count < MAX_NIGHTS:
+        play_night(rules, policies, rng)
+        winner = rules.check_win_condition()
+        if winner:
+            break
+        play_day(rules, policies, rng)
+        rules.reset_night_actions()
+        winner = rules.forced_outcome() if early_stop else rules.check_win_condition()
+
+    return GameResult(WINNER_SIDES.get(winner, "draw"), rules.night_count)
+
+
+def check_forced_outcomes(role_names, games, seed=None, policies=None):
+    # Plays full games and compares every early verdict with the real result.
+    # Returns (mismatches, verdicts checked); mismatches should always be 0.
+    rng = random.Random(seed)
+    policies = policies or DEFAULT_POLICIES
+    mismatches = 0
+    checked = 0
+    for _ in range(games):
+        rules = new_game(role_names, rng)
+        verdicts = []
+        winner = rules.check_win_condition()
+        while not winner and rules.night_count < MAX_NIGHTS:
+            verdicts.append(rules.forced_outcome())
+            play_night(rules, policies, rng)
+            winner = rules.check_win_condition()
+            if winner:
+                break
+            play_day(rules, policies, rng)
+            winner = rules.check_win_condition()
+            rules.reset_night_actions()
+        outcome = WINNER_SIDES.get(winner, "draw")
+        for verdict in verdicts:
+            if verdict:
+                checked += 1
+                if WINNER_SIDES.get(verdict, "draw") != outcome:
+                    mismatches += 1
+    return mismatches, checked
+
+
+def run_games(role_names, games, seed=None, policies=None):
+    # Counts of each outcome over a batch of games
+    rng = random.Random(seed)
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    for _ in range(games):
+        counts[play_game(role_names, rng, policies).outcome] += 1
+    return counts
+
+
+def wilson_interval(successes, games, z=1.96):
+    # 95% confidence interval for a win rate
+    if games == 0:
+        return 0.0, 1.0
+    rate = successes / games
+    denominator = 1 + z * z / games
+    centre = (rate + z * z / (2 * games)) / denominator
+    margin = z * math.sqrt(rate * (1 - rate) / games + z * z / (4 * games * games))
+    margin /= denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def summarize(counts):
+    # Win rates with confidence intervals from outcome counts
+    games = sum(counts.values())
+    return {
+        "games": games,
+        "outcomes": dict(counts),
+        "rates": {o: counts[o] / games if games else 0.0 for o in OUTCOMES},
+        "intervals": {o: wilson_interval(counts[o], games) for o in OUTCOMES},
+    }
+
+
+def stream_games(role_names, seed=None, policies=None):
+    # Endless stream of results; game i is seeded from (seed, i) so runs repeat exactly
+    base = random.Random(seed).getrandbits(64)
+    index = 0
+    while True:
+        yield play_game(role_names, random.Random(base + index), policies)
+        index += 1
+
+
+def run_adaptive(
+    role_names,
+    precision=0.01,
+    min_games=200,
+    max_games=100000,
+    batch=100,
+    seed=None,
+    policies=None,
+):
+    # Yields a running summary after every batch and stops once every outcome's
+    # 95% interval is within +/- precision, or at max_games
+    counts = {outcome: 0 for outcome in OUTCOMES}
+    games = stream_games(role_names, seed, policies)
+    played = 0
+    while played < max_games:
+        for _ in range(min(batch, max_games - played)):
+            counts[next(games).outcome] += 1
+            played += 1
+        summary = summarize(counts)
+        yield summary
+        if played >= min_games and all(
+            (high - low) / 2 <= precision for low, high in summary["intervals"].values()
+        ):
+            return
+
+
+def compare_setups(
+    first,
+    second,
+    outcome="town",
+    precision=0.01,
+    min_games=200,
+    max_games=100000,
+    batch=100,
+    seed=None,
+    policies=None,
+):
+    # Yields (games, difference, half_width) for the difference in one outcome's rate
+    # between two setups. Game i of both setups uses the same random numbers, so the
+    # shared luck cancels out of the paired difference.
+    first_games = stream_games(first, seed, policies)
+    second_games = stream_games(second, seed, policies)
+    played = 0
+    total = 0.0
+    total_squares = 0.0
+    while played < max_games:
+        for _ in range(min(batch, max_games - played)):
+            difference = (next(first_games).outcome == outcome) - (
+                next(second_games).outcome == outcome
+            )
+            total += difference
+            total_squares += difference * difference
+            played += 1
+        mean = total / played
+        variance = max(0.0, total_squares / played - mean * mean)
+        half_width = 1.96 * math.sqrt(variance / played)
+        yield played, mean, half_width
+        if played >= min_games and half_width <= precision:
+            return
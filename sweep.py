@@ -0,0 +1,182 @@
+# sweep.py
+
+import argparse
+import csv
+import itertools
+import json
+import multiprocessing
+import os
+
+from roles import ROLE_CLASSES, get_max_role_count
+from rules import RULES_VERSION
+from simulation import OUTCOMES, run_games
+
+SWEPT_ROLES = ["Vampire", "Doctor", "Hunter"]
+
+# Seats not taken by the swept roles are filled in this order, within each role's maximum
+FILL_ORDER = [
+    "Don Mafia",
+    "Villager",
+    "Villager",
+    "Villager",
+    "Zombie",
+    "Villager",
+    "Villager",
+    "Witch",
+    "Villager",
+    "Villager",
+    "Werewolf",
+    "Occultist",
+    "Ghost",
+    "Werewolf",
+    "Maniac",
+    "Reborn",
+]
+
+MIN_PLAYERS = 5
+MAX_PLAYERS = 23
+CHECKPOINT_EVERY = 20  # Setups finished between checkpoint writes
+
+
+def fill_roles(player_count, counts):
+    # Role list for one setup, or None if the seats can't be filled within the limits
+    role_names = []
+    for role_name, count in counts.items():
+        role_names.extend([role_name] * count)
+    for role_name in FILL_ORDER:
+        if len(role_names) >= player_count:
+            break
+        if role_name in counts:
+            continue
+        if role_names.count(role_name) < get_max_role_count(role_name):
+            role_names.append(role_name)
+    if len(role_names) != player_count:
+        return None
+    return role_names
+
+
+def build_setups(min_players=MIN_PLAYERS, max_players=MAX_PLAYERS, swept_roles=SWEPT_ROLES):
+    setups = []
+    ranges = [range(get_max_role_count(role_name) + 1) for role_name in swept_roles]
+    for player_count in range(min_players, max_players + 1):
+        for combo in itertools.product(*ranges):
+            counts = dict(zip(swept_roles, combo))
+            role_names = fill_roles(player_count, counts)
+            if role_names:
+                setups.append((player_count, combo, role_names))
+    return setups
+
+
+def missing_player_counts(setups, min_players=MIN_PLAYERS, max_players=MAX_PLAYERS):
+    # Player counts that no setup fills, e.g. more seats than all role maxima add up to
+    covered = {player_count for player_count, combo, role_names in setups}
+    return [n for n in range(min_players, max_players + 1) if n not in covered]
+
+
+# Worker state, set once per process by init_worker
+worker_results = None
+worker_setups = None
+worker_games = None
+worker_seed = None
+
+
+def init_worker(results, setups, games, seed):
+    global worker_results, worker_setups, worker_games, worker_seed
+    worker_results = results
+    worker_setups = setups
+    worker_games = games
+    worker_seed = seed
+
+
+def run_setup(index):
+    # Results go straight into the shared array, only the index is sent back
+    role_names = worker_setups[index][2]
+    counts = run_games(role_names, worker_games, seed=worker_seed + index)
+    row = index * len(OUTCOMES)
+    for offset, outcome in enumerate(OUTCOMES):
+        worker_results[row + offset] = counts[outcome]
+    return index
+
+
+def sweep_settings(setups, games, seed):
+    # What a checkpoint's results depend on; resuming with anything else would mix sweeps
+    return {
+        "setups": len(setups),
+        "games": games,
+        "seed": seed,
+        "rules_version": RULES_VERSION,
+    }
+
+
+def load_checkpoint(path, settings):
+    if not path or not os.path.exists(path):
+        return set(), None
+    with open(path) as f:
+        checkpoint = json.load(f)
+    different = [key for key in settings if checkpoint.get(key) != settings[key]]
+    if different:
+        raise ValueError(
+            f"Checkpoint was written for a different sweep ({', '.join(different)} differ)."
+        )
+    return set(checkpoint["done"]), checkpoint["results"]
+
+
+def save_checkpoint(path, settings, done, results):
+    temp_path = path + ".tmp"
+    with open(temp_path, "w") as f:
+        json.dump(dict(settings, done=sorted(done), results=list(results)), f)
+    os.replace(temp_path, path)  # Never leave a half-written checkpoint behind
+
+
+def run_sweep(games=200, workers=None, seed=0, checkpoint=None, setups=None):
+    setups = setups or build_setups()
+    results = multiprocessing.Array("q", len(setups) * len(OUTCOMES), lock=False)
+
+    settings = sweep_settings(setups, games, seed)
+    done, saved = load_checkpoint(checkpoint, settings)
+    if saved:
+        results[:] = saved
+    pending = [i for i in range(len(setups)) if i not in done]
+
+    with multiprocessing.Pool(
+        workers, initializer=init_worker, initargs=(results, setups, games, seed)
+    ) as pool:
+        for finished, index in enumerate(pool.imap_unordered(run_setup, pending), 1):
+            done.add(index)
+            if checkpoint and finished % CHECKPOINT_EVERY == 0:
+                save_checkpoint(checkpoint, settings, done, results)
+    if checkpoint:
+        save_checkpoint(checkpoint, settings, done, results)
+
+    return setups, list(results)
+
+
+def export_table(path, setups, results, swept_roles=SWEPT_ROLES):
+    # One row per setup, ready to pivot into heatmaps
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["players"] + swept_roles + ["games"] + list(OUTCOMES))
+        for index, (player_count, combo, role_names) in enumerate(setups):
+            row = results[index * len(OUTCOMES) : (index + 1) * len(OUTCOMES)]
+            writer.writerow([player_count] + list(combo) + [sum(row)] + row)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep role setups by simulation.")
+    parser.add_argument("--games", type=int, default=200, help="games per setup")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint", default="sweep_checkpoint.json")
+    parser.add_argument("--out", default="sweep.csv")
+    args = parser.parse_args()
+
+    setups = build_setups()
+    seats = sum(get_max_role_count(role_name) for role_name in ROLE_CLASSES)
+    for player_count in missing_player_counts(setups):
+        print(
+            f"Warning: no setup fills {player_count} players within the role limits "
+            f"({seats} seats at most)"
+        )
+    setups, results = run_sweep(args.games, args.workers, args.seed, args.checkpoint, setups)
+    export_table(args.out, setups, results)
+    print(f"Wrote {len(setups)} setups to {args.out}")
@@ -0,0 +1,183 @@
+# terminal.py
+
+import sys
+
+from roles import (
+    ROLE_CLASSES,
+    Hunter,
+    create_role,
+    create_reborn_role,
+    get_max_role_count,
+)
+from players import Player
+from rules import GameRules, NightActionError
+from profiles import ProfileStore
+from archive import archive_game
+
+# Host a game from a plain terminal, without Kivy or OpenGL. Follows the same flow
+# as GameScreen: role assignment, night roles in order, discussion, voting and revotes.
+
+
+def choose(prompt, options, allow_skip=False):
+    # Numbered menu over (label, value) pairs; returns a value, or None when skipped
+    while True:
+        print(prompt)
+        for number, (label, value) in enumerate(options, 1):
+            print(f"  {number}. {label}")
+        if allow_skip:
+            print("  0. Skip")
+        answer = input("> ").strip()
+        if allow_skip and answer == "0":
+            return None
+        if answer.isdigit() and 1 <= int(answer) <= len(options):
+            return options[int(answer) - 1][1]
+        print("Please enter one of the numbers above.")
+
+
+def player_options(players):
+    return [(f"{p.name} ({p.role.name})", p) for p in players]
+
+
+class TerminalHost:
+    def __init__(self, player_count):
+        self.players = [Player(player_id=i + 1) for i in range(player_count)]
+        self.game_rules = GameRules(self.players)
+        self.seat_profiles = {}  # player_id -> profile name, see profiles.py
+
+    def role_count(self, role_name):
+        return sum(1 for p in self.players if p.role and p.role.name == role_name)
+
+    def assign_roles(self):
+        print("\n== Role Assignment ==")
+        for player in self.players:
+            name = input(f"Regular's name for {player.name} (Enter to skip): ").strip()
+            if name:
+                self.seat_profiles[player.player_id] = name
+                player.name = name
+            available = [
+                (role_name, role_name)
+                for role_name in ROLE_CLASSES
+                if self.role_count(role_name) < get_max_role_count(role_name)
+            ]
+            role_name = choose(f"Role for {player.name}:", available)
+            if role_name == "Reborn":
+                choice = choose(
+                    "Choose your path:",
+                    [("Become a Hunter", "Hunter"), ("Become a Werewolf", "Werewolf")],
+                )
+                player.assign_role(create_reborn_role(choice))
+            else:
+                player.assign_role(create_role(role_name))
+
+    def night_action(self, player):
+        # Returns a record for GameRules.set_night_actions, or None
+        targets = self.game_rules.night_targets(player)
+        if not targets:
+            return None  # No action of their own
+        prompt = f"{player.name} ({player.role.name}) targets:"
+
+        bullet_type = None
+        if isinstance(player.role, Hunter):
+            bullets = [("Check a Player", None)]
+            if player.role.normal_bullets:
+                bullets.append((f"Normal Bullet ({player.role.normal_bullets} left)", "normal"))
+            if player.role.silver_bullets:
+                bullets.append((f"Silver Bullet ({player.role.silver_bullets} left)", "silver"))
+            bullet_type = choose(f"{player.name} (Hunter) action:", bullets)
+        target = choose(prompt, player_options(targets), allow_skip=True)
+        if not target:
+            return None
+        kind = self.game_rules.default_action_kind(player, bullet_type)
+        return (player, kind, target, bullet_type)
+
+    def night(self):
+        print(f"\n== Night {self.game_rules.night_count + 1} ==")
+        schedule = self.game_rules.night_schedule()
+        while True:
+            records = []
+            for role_name, role_players in schedule:
+                actors = self.game_rules.night_actors([(role_name, role_players)])
+                if actors:
+                    print(f"-- {role_name}'s Turn --")
+                for player in actors:
+                    record = self.night_action(player)
+                    if record:
+                        records.append(record)
+            try:
+                self.game_rules.set_night_actions(records)
+                break
+            except NightActionError as e:
+                print("Invalid night actions, please enter the night again:")
+                for error in e.errors:
+                    print(f"  {error}")
+
+        night_log, summary = self.game_rules.execute_night_actions()
+        print("\n== Night Summary ==")
+        for line in self.game_rules.render(summary) or ["A quiet night."]:
+            print(line)
+
+    def discussion(self):
+        print("\n== Discussion ==")
+        while True:
+            answer = input("Press Enter to start voting, or L to view the logbook: ")
+            if answer.strip().lower() != "l":
+                return
+            for line in self.game_rules.logbook_lines():
+                print(line)
+
+    def voting(self):
+        phase = "Voting"
+        while True:
+            print(f"\n== {phase} ==")
+            for voter in self.game_rules.players_in(self.game_rules.voter_mask()):
+                options = self.game_rules.vote_targets(voter)
+                if options:
+                    target = choose(f"{voter.name} votes for:", player_options(options))
+                    target.votes += 1
+            result = self.game_rules.resolve_votes()
+            if result != "Tie":
+                print(f"{result.name} has been eliminated.")
+                return
+            # Revote among the tied players; they can't vote themselves
+            max_votes = max(p.votes for p in self.players if p.alive)
+            self.game_rules.set_tied(
+                [p for p in self.players if p.votes == max_votes and p.alive]
+            )
+            for player in self.players:
+                player.reset_votes()
+            if not self.game_rules.voter_mask():
+                print("There is a tie and nobody left to revote. Nobody is eliminated.")
+                return
+            print("There is a tie. Proceed to revote.")
+            phase = "Revote"
+
+    def run(self):
+        self.assign_roles()
+        while True:
+            self.night()
+            self.discussion()
+            self.voting()
+            winner = self.game_rules.check_win_condition()
+            if winner:
+                print(f"\n== Game Over: {winner} ==")
+                archive_game(self.game_rules, winner)
+                if self.seat_profiles:
+                    store = ProfileStore()
+                    store.record_game(self.game_rules, winner, self.seat_profiles)
+                    store.close()
+                return winner
+            self.game_rules.reset_night_actions()
+
+
+if __name__ == "__main__":
+    try:
+        count = int(sys.argv[1]) if len(sys.argv) > 1 else int(
+            input("Enter number of players (1 to 23): ")
+        )
+        if count > 23:
+            raise ValueError("The maximum number of players is 23.")
+        TerminalHost(count).run()
+    except ValueError as e:
+        print(e)
+    except (EOFError, KeyboardInterrupt):
+        print()
@@ -0,0 +1,45 @@
+# test_archive.py
+
+import json
+
+import pytest
+
+from archive import ArchiveWriter, read_games, sample_records, train_dictionary
+
+
+def records(games, seed):
+    return [json.loads(data) for data in sample_records(games, seed=seed)]
+
+
+def test_archived_games_read_back_unchanged(tmp_path):
+    path = str(tmp_path / "games.mla")
+    games = records(20, seed=2)
+    with ArchiveWriter(path, train_dictionary(sample_records(10))) as writer:
+        for record in games[:10]:
+            writer.write(record)
+    # Appending reuses the dictionary in the header
+    with ArchiveWriter(path) as writer:
+        for record in games[10:]:
+            writer.write(record)
+    assert list(read_games(path)) == games
+
+
+def test_truncated_archive(tmp_path):
+    path = str(tmp_path / "games.mla")
+    games = records(6, seed=3)
+    with ArchiveWriter(path, train_dictionary(sample_records(10))) as writer:
+        for record in games[:5]:
+            writer.write(record)
+    with open(path, "rb") as f:
+        data = f.read()
+    # A crash partway through writing the last frame
+    with open(path, "wb") as f:
+        f.write(data[:-7])
+
+    with pytest.raises(ValueError):
+        list(read_games(path))
+
+    # Reopening drops the half frame, and the games before it survive
+    with ArchiveWriter(path) as writer:
+        writer.write(games[5])
+    assert list(read_games(path)) == games[:4] + games[5:]
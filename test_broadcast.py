@@ -0,0 +1,78 @@
+# test_broadcast.py
+
+from broadcast import Broadcaster, SpectatorClient, decode
+
+
+def game_states(nights=6, players=9):
+    # What a game shows spectators from night to night: one more player gone each
+    # night, and somebody disabled on odd nights
+    for night in range(1, nights + 1):
+        eliminated = list(range(1, night + 1))
+        disabled = [night + 1] if night % 2 else []
+        for phase in ("Day", "Voting", "Night"):
+            yield {
+                "night": night,
+                "players": players,
+                "eliminated": eliminated,
+                "disabled": disabled,
+                "phase": phase,
+            }
+
+
+class Recorder(SpectatorClient):
+    # Keeps every message it was handed, to check what was sent and when
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def __call__(self, data):
+        self.messages.append(data)
+        super().__call__(data)
+
+
+def test_spectators_follow_the_feed():
+    broadcaster = Broadcaster(keyframe_interval=4)
+    clients = [broadcaster.subscribe(Recorder()) for _ in range(3)]
+    late = None
+    for number, state in enumerate(game_states()):
+        broadcaster.publish(state)
+        if number == 5:
+            late = broadcaster.subscribe(Recorder())
+        followers = clients if late is None else clients + [late]
+        for client in followers:
+            assert client.state == broadcaster.state
+
+    # Every subscriber was handed the very same encoded message
+    for messages in zip(*(client.messages for client in clients)):
+        assert all(message is messages[0] for message in messages)
+    # Most messages are deltas, and the early subscribers started from a keyframe
+    assert sum("delta" in decode(message) for message in clients[0].messages) > 10
+    assert "key" in decode(clients[0].messages[0])
+
+    # The late joiner starts from a keyframe of the state so far, then gets what everyone gets
+    assert "key" in decode(late.messages[0])
+    assert decode(late.messages[0])["seq"] == decode(clients[0].messages[5])["seq"]
+    assert late.messages[1:] == clients[0].messages[6:]
+
+
+def test_spectator_recovers_at_the_next_keyframe():
+    broadcaster = Broadcaster(keyframe_interval=4)
+    client = Recorder()
+    sent = []
+
+    def lossy_link(data):
+        # Loses the third message on the way
+        sent.append(data)
+        if len(sent) != 3:
+            client(data)
+
+    broadcaster.subscribe(lossy_link)
+    states = list(game_states())
+    for state in states[:3]:
+        broadcaster.publish(state)
+    assert client.state != broadcaster.state  # Behind, without knowing it yet
+    broadcaster.publish(states[3])
+    assert client.state is None  # Saw the gap in the sequence and dropped its state
+    broadcaster.publish(states[4])
+    assert "key" in decode(sent[-1])
+    assert client.state == broadcaster.state
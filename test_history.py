@@ -0,0 +1,81 @@
+# test_history.py
+
+import random
+
+from archive import game_record
+from history import History, chain_entries
+from simulation import DEFAULT_POLICIES, STANDARD_SETUPS, new_game, play_day, play_night
+
+
+def play_steps(rules, history, rng):
+    # Plays the game a step at a time like the game screen, with a checkpoint before
+    # every step; returns the game record after each one
+    records = [game_record(rules)]
+    steps = [play_night, play_day, lambda rules, policies, rng: rules.reset_night_actions()]
+    while not rules.check_win_condition() and len(records) < 30:
+        step = steps[(len(records) - 1) % len(steps)]
+        history.checkpoint(rules)
+        step(rules, DEFAULT_POLICIES, rng)
+        records.append(game_record(rules))
+    return records
+
+
+def test_undo_and_redo_give_back_every_state():
+    rules = new_game(STANDARD_SETUPS["big"], random.Random(5), logging=True)
+    history = History()
+    records = play_steps(rules, history, random.Random(6))
+    assert len(records) > 3
+
+    for record in reversed(records[:-1]):
+        history.undo(rules)
+        assert game_record(rules) == record
+    assert not history.can_undo()
+
+    for record in records[1:]:
+        history.redo(rules)
+        assert game_record(rules) == record
+    assert not history.can_redo()
+
+
+def test_snapshots_share_what_did_not_change():
+    rules = new_game(STANDARD_SETUPS["big"], random.Random(7), logging=True)
+    history = History()
+    play_steps(rules, history, random.Random(8))
+    snapshots = history.undo_stack
+    for before, after in zip(snapshots, snapshots[1:]):
+        # Each snapshot's logbook and actions grow the previous snapshot's chain
+        assert chain_entries(after.log_node)[: before.log_length] == chain_entries(
+            before.log_node
+        )
+        if after.log_length > before.log_length:
+            assert after.log_node[0] is before.log_node
+        if after.action_length > before.action_length:
+            assert after.action_node[0] is before.action_node
+        for state_before, state_after in zip(before.players, after.players):
+            if state_before == state_after:
+                assert state_before is state_after
+    last = snapshots[-1]
+    assert [tuple(entry) for entry in chain_entries(last.log_node)] == rules.logbook[
+        : last.log_length
+    ]
+
+
+def test_cancelled_checkpoint_keeps_redo():
+    rules = new_game(STANDARD_SETUPS["big"], random.Random(9), logging=True)
+    history = History()
+    records = play_steps(rules, history, random.Random(10))
+    history.undo(rules)
+    history.undo(rules)
+
+    # A rejected action changes nothing, so both redos are still there
+    history.checkpoint(rules)
+    history.cancel_checkpoint()
+    assert len(history.redo_stack) == 2
+    history.redo(rules)
+    history.redo(rules)
+    assert game_record(rules) == records[-1]
+
+    # An action that goes through starts a new branch
+    history.undo(rules)
+    history.checkpoint(rules)
+    assert not history.can_redo()
@@ -0,0 +1,83 @@
+# test_logindex.py
+
+from events import (
+    CHECK_RED,
+    DOCTOR_HEAL,
+    DON_TARGET,
+    FOUND_DEAD,
+    NIGHT_START,
+    NORMAL_KILL,
+    VOTED_OUT,
+)
+from logindex import GameSearch, LogIndex, parse_query
+from roles import Doctor, DonMafia, Hunter, Villager, create_reborn_role
+
+# Seats: 1 Don Mafia, 2 Hunter, 3 Doctor, 4 Villager, 5 Reborn Hunter
+ROLES = {
+    1: DonMafia(),
+    2: Hunter(),
+    3: Doctor(),
+    4: Villager(),
+    5: create_reborn_role("Hunter"),
+}
+LOGBOOK = [
+    (NIGHT_START, None, None, 1),
+    (DON_TARGET, 1, 4, 1),
+    (CHECK_RED, 2, 1, 1),
+    (DOCTOR_HEAL, 3, 2, 1),
+    (FOUND_DEAD, None, 4, 1),
+    (VOTED_OUT, None, 3, 1),
+    (NIGHT_START, None, None, 2),
+    (DON_TARGET, 1, 2, 2),
+    (NORMAL_KILL, 5, 1, 2),
+    (CHECK_RED, 2, 5, 2),
+]
+
+
+def test_parse_query():
+    assert parse_query("Player 7") == [("player", 7)]
+    assert parse_query("Hunter night 2") == [("night", 2), ("role", "hunter")]
+    assert parse_query("night2 player 3 kill") == [
+        ("night", 2),
+        ("player", 3),
+        ("action", "kill"),
+    ]
+    # The longest role name wins, so Don Mafia isn't also read as Mafia
+    assert parse_query("Don Mafia") == [("role", "don mafia")]
+    assert parse_query("whatever happened") == []
+
+
+def test_search_needs_every_key():
+    index = LogIndex()
+    index.add_events("current", 0, LOGBOOK, ROLES)
+
+    def found(text):
+        return [LOGBOOK[position] for game, position in index.search(parse_query(text))]
+
+    assert found("Hunter night 1") == [(CHECK_RED, 2, 1, 1)]
+    # A Reborn Hunter is found as a Hunter too
+    assert found("Hunter night 2") == [(NORMAL_KILL, 5, 1, 2), (CHECK_RED, 2, 5, 2)]
+    assert found("Hunter shoot") == [(NORMAL_KILL, 5, 1, 2)]
+    assert found("player 2 night 2") == [(DON_TARGET, 1, 2, 2), (CHECK_RED, 2, 5, 2)]
+    assert found("player 4") == [(DON_TARGET, 1, 4, 1), (FOUND_DEAD, None, 4, 1)]
+    assert found("Doctor night 2") == []
+    assert index.search([]) == []
+
+
+def test_games_are_filed_by_number():
+    games = GameSearch()
+    names = ["Ann", "Bo", "Cy", "Di", "Ed"]
+    games.add_game(3, names, LOGBOOK, ROLES)
+    games.add_game(1, [name + "2" for name in names], LOGBOOK[:6], ROLES)
+
+    # Matches from every game, the lower game number first
+    assert games.search_text("vote") == [
+        (1, (VOTED_OUT, None, 3, 1)),
+        (3, (VOTED_OUT, None, 3, 1)),
+    ]
+    assert [number for number, event in games.search_text("Hunter")] == [1, 3, 3, 3]
+    assert games.search_text("night 2 Doctor") == []
+
+    # Each game's entries are rendered with that game's names
+    rendered = [games.render(number, event) for number, event in games.search_text("heal")]
+    assert rendered == ["Doctor Cy2 healed Bo2", "Doctor Cy healed Bo"]
@@ -0,0 +1,12 @@
+# test_replay.py
+
+import json
+
+from archive import sample_records
+from replay import diff_game
+
+
+def test_recorded_games_replay_unchanged():
+    # Sample records end with a dusk after the deciding vote
+    for data in sample_records(100, seed=4):
+        assert diff_game(json.loads(data)) == []
@@ -0,0 +1,88 @@
+# test_simulation.py
+
+import random
+
+import pytest
+
+from rules import NightActionError
+from simulation import STANDARD_SETUPS, check_forced_outcomes, new_game
+
+
+# Small tables reach the endgames forced_outcome rules on; the standard ones rarely do
+ENDGAME_SETUPS = [
+    ["Don Mafia", "Villager", "Villager", "Villager"],
+    ["Maniac", "Villager", "Villager", "Villager"],
+    ["Zombie", "Villager", "Villager", "Hunter"],
+    ["Don Mafia", "Zombie", "Villager", "Villager", "Villager", "Villager", "Doctor"],
+]
+
+
+def test_forced_outcomes_match_full_games():
+    for role_names in list(STANDARD_SETUPS.values()) + ENDGAME_SETUPS:
+        mismatches, checked = check_forced_outcomes(role_names, 300, seed=1)
+        assert mismatches == 0
+
+
+def test_endgames_are_forced():
+    for role_names in ENDGAME_SETUPS:
+        mismatches, checked = check_forced_outcomes(role_names, 300, seed=1)
+        assert checked > 0
+
+
+def night_table():
+    # Don Mafia, Villager, Doctor, Hunter in seats 1 to 4, plus a player from another game
+    rules = new_game(["Don Mafia", "Villager", "Doctor", "Hunter"], random.Random(0))
+    other = new_game(["Villager"], random.Random(0)).players[0]
+    return (rules, *rules.players, other)
+
+
+def rejected(rules, records):
+    with pytest.raises(NightActionError) as error:
+        rules.set_night_actions(records)
+    return error.value.errors
+
+
+def test_night_input_from_outside_the_game_is_rejected():
+    rules, don, villager, doctor, hunter, other = night_table()
+    assert rejected(rules, [(other, "kill", villager, None)]) == [
+        f"{other.name} is not a player in this game"
+    ]
+    assert rejected(rules, [(don, "kill", other, None)]) == [
+        f"{other.name} is not a player in this game"
+    ]
+    assert rejected(rules, [(don, "kill", None, None)]) == [f"{don.name} needs a target to kill"]
+
+
+def test_bullets_are_checked():
+    rules, don, villager, doctor, hunter, other = night_table()
+    hunter.role.silver_bullets = 0
+    assert rejected(rules, [(hunter, "shoot", don, "silver")]) == [
+        f"Hunter {hunter.name} has no silver bullets left"
+    ]
+    assert rejected(rules, [(hunter, "shoot", don, "golden")]) == ["Unknown bullet type golden"]
+    assert rejected(rules, [(doctor, "heal", villager, "normal")]) == [
+        f"{doctor.name} can only use a bullet to shoot"
+    ]
+
+
+def test_night_input_is_all_or_nothing():
+    rules, don, villager, doctor, hunter, other = night_table()
+    errors = rejected(
+        rules,
+        [
+            (don, "kill", villager, None),
+            (doctor, "heal", other, None),
+            (hunter, "shoot", don, "golden"),
+            (don, "kill", doctor, None),
+        ],
+    )
+    # Every problem is reported at once, and the valid records weren't applied either
+    assert errors == [
+        f"{other.name} is not a player in this game",
+        "Unknown bullet type golden",
+        f"{don.name} can only act once per night",
+    ]
+    assert not any(p.has_acted or p.action_target for p in rules.players)
+
+    rules.set_night_actions([(don, "kill", villager, None), (doctor, "heal", villager, None)])
+    assert don.action_target is villager and doctor.has_acted
@@ -0,0 +1,240 @@
+# tournament.py
+
+import argparse
+import itertools
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from simulation import STANDARD_SETUPS, RandomPolicy, play_game
+
+
+class TriggerHappyPolicy(RandomPolicy):
+    # Hunters shoot whenever they have a bullet
+    hunter_shoot_chance = 1.0
+
+
+class CautiousPolicy(RandomPolicy):
+    # Hunters only ever check
+    hunter_shoot_chance = 0.0
+
+
+class BandwagonPolicy(RandomPolicy):
+    # Mafia pile all their votes onto the same town player
+    def vote(self, rules, voter, candidates, rng):
+        town = [p for p in candidates if not p.role.is_mafia_aligned()]
+        if voter.role.is_mafia_aligned() and town:
+            return min(town, key=lambda p: p.player_id)
+        return super().vote(rules, voter, candidates, rng)
+
+
+class FollowerPolicy(RandomPolicy):
+    # Votes with whoever is already leading the count
+    def vote(self, rules, voter, candidates, rng):
+        if voter.role.is_mafia_aligned():
+            town = [p for p in candidates if not p.role.is_mafia_aligned()]
+            if town:
+                candidates = town
+        top = max(p.votes for p in candidates)
+        if top > 0:
+            candidates = [p for p in candidates if p.votes == top]
+        return rng.choice(candidates)
+
+
+STRATEGIES = {
+    "town": {
+        "random": RandomPolicy(),
+        "trigger-happy": TriggerHappyPolicy(),
+        "cautious": CautiousPolicy(),
+        "follower": FollowerPolicy(),
+    },
+    "mafia": {
+        "random": RandomPolicy(),
+        "bandwagon": BandwagonPolicy(),
+        "follower": FollowerPolicy(),
+    },
+    "maniac": {
+        "random": RandomPolicy(),
+        "follower": FollowerPolicy(),
+    },
+}
+
+ELO_START = 1500
+ELO_K = 16
+BATCH_GAMES = 50  # Games per task sent to a worker
+MIN_GAMES = 200
+MAX_GAMES = 5000
+PRECISION = 50  # A pairing is settled once every rating difference it shows is known to +/- this
+Z = 1.96  # 95% intervals
+
+
+def play_batch(role_names, strategy_names, games, seed):
+    # Runs in a worker process; strategies travel by name
+    policies = {side: STRATEGIES[side][name] for side, name in strategy_names.items()}
+    rng = random.Random(seed)
+    return [play_game(role_names, rng, policies).outcome for _ in range(games)]
+
+
+def expected_score(rating, other):
+    return 1 / (1 + 10 ** ((other - rating) / 400))
+
+
+def rating_difference(wins, losses, draws):
+    # Elo difference between two sides implied by their score against each other, and
+    # the margin on it. Half a win goes to each side so a clean sweep stays finite.
+    games = wins + losses + draws + 1
+    score = (wins + draws / 2 + 0.5) / games
+    difference = 400 * math.log10(score / (1 - score))
+    margin = Z * 400 / math.log(10) / math.sqrt(games * score * (1 - score))
+    return difference, margin
+
+
+class EloTable:
+    # Online Elo ratings for (side, strategy) entries, updated game by game
+    def __init__(self, k=ELO_K):
+        self.k = k
+        self.ratings = {}
+
+    def rating(self, entry):
+        return self.ratings.get(entry, ELO_START)
+
+    def update_pair(self, first, second, score):
+        expected = expected_score(self.rating(first), self.rating(second))
+        change = self.k * (score - expected)
+        self.ratings[first] = self.rating(first) + change
+        self.ratings[second] = self.rating(second) - change
+
+    def record(self, entries, outcome):
+        # The winning side beats every other side at the table; a draw splits evenly
+        for first, second in itertools.combinations(entries, 2):
+            if outcome == first[0]:
+                self.update_pair(first, second, 1.0)
+            elif outcome == second[0]:
+                self.update_pair(first, second, 0.0)
+            elif outcome == "draw":
+                self.update_pair(first, second, 0.5)
+
+    def standings(self):
+        return sorted(self.ratings.items(), key=lambda item: (item[0][0], -item[1]))
+
+
+class Pairing:
+    def __init__(self, setup_name, role_names, strategy_names):
+        self.setup_name = setup_name
+        self.role_names = role_names
+        self.strategy_names = strategy_names
+        self.entries = [(side, name) for side, name in strategy_names.items()]
+        self.outcomes = {}
+        self.games = 0
+        self.in_flight = 0
+
+    def add(self, outcomes):
+        for outcome in outcomes:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        self.games += len(outcomes)
+
+    def settled(self, precision=PRECISION, min_games=MIN_GAMES, max_games=MAX_GAMES):
+        if self.games >= max_games:
+            return True
+        if self.games < min_games:
+            return False
+        # The same pairwise scores the Elo table is fed: a game one side wins counts
+        # against every other side, and a draw is half a win for each
+        draws = self.outcomes.get("draw", 0)
+        for first, second in itertools.combinations(self.strategy_names, 2):
+            difference, margin = rating_difference(
+                self.outcomes.get(first, 0), self.outcomes.get(second, 0), draws
+            )
+            if margin > precision:
+                return False
+        return True
+
+
+def sides_in(role_names):
+    # Maniac strategies only matter in setups that have a Maniac
+    sides = ["town", "mafia"]
+    if "Maniac" in role_names:
+        sides.append("maniac")
+    return sides
+
+
+def build_pairings(setups):
+    pairings = []
+    for setup_name, role_names in setups.items():
+        sides = sides_in(role_names)
+        for names in itertools.product(*(sorted(STRATEGIES[side]) for side in sides)):
+            pairings.append(Pairing(setup_name, role_names, dict(zip(sides, names))))
+    return pairings
+
+
+def run_tournament(setups=None, workers=None, seed=0, precision=PRECISION):
+    setups = setups or STANDARD_SETUPS
+    pairings = build_pairings(setups)
+    elo = EloTable()
+    seeds = itertools.count(seed)
+    pending = {}
+
+    workers = workers or os.cpu_count() or 1
+    slots = workers * 2  # Keep every worker busy without over-queuing
+
+    with ProcessPoolExecutor(workers) as pool:
+
+        def submit(pairing):
+            future = pool.submit(
+                play_batch,
+                pairing.role_names,
+                pairing.strategy_names,
+                BATCH_GAMES,
+                next(seeds),
+            )
+            pairing.in_flight += 1
+            pending[future] = pairing
+
+        def open_pairings():
+            return [
+                p for p in pairings if not p.settled(precision) and p.in_flight == 0
+            ]
+
+        while True:
+            for pairing in open_pairings()[: max(0, slots - len(pending))]:
+                submit(pairing)
+            if not pending:
+                break
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pairing = pending.pop(future)
+                pairing.in_flight -= 1
+                outcomes = future.result()
+                pairing.add(outcomes)
+                for outcome in outcomes:
+                    elo.record(pairing.entries, outcome)
+
+    return elo, pairings
+
+
+def parse_setup(text):
+    # "Don Mafia,Villager,..." on the command line
+    return [role_name.strip() for role_name in text.split(",") if role_name.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Round-robin bot strategy tournament.")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--precision", type=float, default=PRECISION, help="rating points, +/-"
+    )
+    parser.add_argument(
+        "--setup", action="append", default=[], help="comma-separated custom role list"
+    )
+    args = parser.parse_args()
+
+    setups = dict(STANDARD_SETUPS)
+    for i, text in enumerate(args.setup, 1):
+        setups[f"custom {i}"] = parse_setup(text)
+
+    elo, pairings = run_tournament(setups, args.workers, args.seed, args.precision)
+    for (side, name), rating in elo.standings():
+        print(f"{side:7} {name:14} {rating:7.1f}")
+    print(f"{sum(p.games for p in pairings)} games over {len(pairings)} pairings")